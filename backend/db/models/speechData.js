@@ -52,6 +52,7 @@ const SpeechDataSchema = new mongoose.Schema({
     },
   ],
   recording_url: { type: String }, // Store S3 file link
+  delivery_id: { type: String, unique: true, sparse: true }, // Idempotency key set by the analysis service
 });
 
 module.exports = mongoose.model("SpeechData", SpeechDataSchema);
@@ -3,6 +3,77 @@ const router = express.Router();
 const SpeechData = require("../db/models/speechData");
 const authMiddleware = require("../util/authMiddleware");
 
+const validNotes = [
+  "fast",
+  "slow",
+  "normal-speed",
+  "high-pitch",
+  "low-pitch",
+  "normal-pitch",
+  "loud",
+  "quiet",
+  "normal-volume",
+  "unstable-volume",
+  "stable-volume",
+  "unstable-pitch",
+  "monotone",
+  "stable-pitch",
+  "unstable-speed",
+  "stable-speed"
+];
+
+// Returns an error body for an invalid speech data document, or null
+const validateSpeechData = (body) => {
+  const { user_id, metrics, thresholds, audio_notes = [] } = body;
+
+  // Validate required fields
+  if (!user_id || !metrics || !thresholds) {
+    return { error: "User ID, metrics, and thresholds are required." };
+  }
+
+  // user_id is stored as an ObjectId; anything else makes Mongoose throw on save
+  if (!/^[0-9a-fA-F]{24}$/.test(String(user_id))) {
+    return { error: "User ID must be a 24-character hex ObjectId." };
+  }
+
+  // Validate audio_notes format
+  const invalidNotes = audio_notes.filter(
+    (note) => !validNotes.includes(note),
+  );
+  if (invalidNotes.length > 0) {
+    return {
+      error: `Invalid audio notes: ${invalidNotes.join(", ")}`,
+      validNotes,
+    };
+  }
+
+  return null;
+};
+
+// Fields of a speech data document as stored
+const toSpeechData = (body) => ({
+  user_id: body.user_id,
+  date_recorded: body.date_recorded || new Date(),
+  metrics: body.metrics,
+  thresholds: body.thresholds,
+  audio_notes: body.audio_notes,
+  recording_url: body.recording_url,
+  delivery_id: body.delivery_id,
+});
+
+// Write for one document: documents with a delivery_id (set by the analysis
+// service) are upserted on it, so a retried delivery is stored only once
+const toWriteOperation = (document) =>
+  document.delivery_id
+    ? {
+        updateOne: {
+          filter: { delivery_id: document.delivery_id },
+          update: { $setOnInsert: document },
+          upsert: true,
+        },
+      }
+    : { insertOne: { document } };
+
 // GET /api/speechData/:userId?startDate=YYYY-MM-DD&endDate=YYYY-MM-DD
 router.get("/:patientId", authMiddleware, async (req, res) => {
   console.log("/api/speechData/:patientId");
@@ -51,67 +122,24 @@ router.get("/:patientId", authMiddleware, async (req, res) => {
 router.post("/", async (req, res) => {
   try {
     console.log("/api/speechData");
-    // Extract data from the request body
-    const {
-      user_id,
-      date_recorded,
-      metrics,
-      thresholds,
-      audio_notes,
-      recording_url,
-    } = req.body;
-
-    // Validate required fields
-    if (!user_id || !metrics || !thresholds) {
-      return res
-        .status(400)
-        .json({ error: "User ID, metrics, and thresholds are required." });
-    }
-
-    // Validate audio_notes format
-    const validNotes = [
-      "fast",
-      "slow",
-      "normal-speed",
-      "high-pitch",
-      "low-pitch",
-      "normal-pitch",
-      "loud",
-      "quiet",
-      "normal-volume",
-      "unstable-volume",
-      "stable-volume",
-      "unstable-pitch",
-      "monotone",
-      "stable-pitch",
-      "unstable-speed",
-      "stable-speed"
-    ];
-
-    const invalidNotes = audio_notes.filter(
-      (note) => !validNotes.includes(note),
-    );
-    if (invalidNotes.length > 0) {
-      return res.status(400).json({
-        error: `Invalid audio notes: ${invalidNotes.join(", ")}`,
-        validNotes,
-      });
+    const validationError = validateSpeechData(req.body);
+    if (validationError) {
+      return res.status(400).json(validationError);
     }
 
     // Create a new SpeechData instance
-    const speechData = new SpeechData({
-      user_id,
-      date_recorded: date_recorded || new Date(),
-      metrics,
-      thresholds,
-      audio_notes,
-      recording_url,
-    });
+    const speechData = new SpeechData(toSpeechData(req.body));
 
     console.log("speechData: ", speechData);
 
-    // Save the data to the database
-    const savedData = await speechData.save();
+    // Save the data to the database; a repeated delivery_id returns the stored document
+    const savedData = speechData.delivery_id
+      ? await SpeechData.findOneAndUpdate(
+          { delivery_id: speechData.delivery_id },
+          { $setOnInsert: speechData.toObject() },
+          { upsert: true, new: true },
+        )
+      : await speechData.save();
 
     // Respond with the saved document
     res.status(201).json({
@@ -124,6 +152,38 @@ router.post("/", async (req, res) => {
   }
 });
 
+// POST /api/speechData/batch
+// Used by the analysis service to write several results in one request
+router.post("/batch", async (req, res) => {
+  try {
+    console.log("/api/speechData/batch");
+    const { documents } = req.body;
+
+    if (!Array.isArray(documents) || !documents.length) {
+      return res.status(400).json({ error: "A non-empty documents array is required." });
+    }
+
+    for (const [index, document] of documents.entries()) {
+      const validationError = validateSpeechData(document);
+      if (validationError) {
+        return res.status(400).json({ ...validationError, index });
+      }
+    }
+
+    const result = await SpeechData.bulkWrite(
+      documents.map((document) => toWriteOperation(new SpeechData(toSpeechData(document)).toObject())),
+    );
+
+    res.status(201).json({
+      message: "Speech metrics added successfully.",
+      inserted: result.insertedCount + result.upsertedCount,
+    });
+  } catch (error) {
+    console.error("Error adding speech metrics batch:", error);
+    res.status(500).json({ error: "Failed to add speech metrics." });
+  }
+});
+
 // Updated API route to include date filtering
 router.get("/:userId/recordings", async (req, res) => {
   try {
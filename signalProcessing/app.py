@@ -1,4 +1,4 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, g, send_file, url_for
 from flask_cors import CORS
 import contextlib
 import subprocess
@@ -6,8 +6,13 @@ import io
 import os
 import re
 import glob
+import json
 import logging
+import math
 import sys
+import threading
+import uuid
+from types import SimpleNamespace
 
 import parselmouth
 from parselmouth.praat import call, run_file
@@ -19,9 +24,16 @@ import librosa
 import soundfile as sf
 
 from analysis_parser import parse_analysis_output, print_analysis_history
+from fast_pitch import analyze_pitch, pitch_features
+from feature_graph import FeatureGraph
+from contour_store import save_contours, valid_recording_id, contour_dir
+from profiling import new_request_id, new_profile_id, should_profile, profile_call, profile_path, list_profiles, format_profile
+from delivery import ResultDelivery, to_speech_data, valid_object_id, backend_url
+from scheduler import Scheduler, CancelToken, AnalysisCancelled, AdmissionRejected, default_deadline, max_deadline
+from progressive import ResultStore, progressive_budget, preview_seconds, write_preview, approximate_result, max_result_wait, preview_workers
 
 app = Flask(__name__)
-CORS(app)  # Enable CORS for all routes
+CORS(app, expose_headers=["X-Request-ID", "X-Profile-ID"])  # Enable CORS for all routes
 
 # Configure logging to both file and console
 logging.basicConfig(
@@ -36,7 +48,24 @@ logger = logging.getLogger(__name__)
 
 root_folder = os.path.abspath("./")
 praat_script = root_folder + "/myspsolution.praat"
-output_path = root_folder + "/audio/output.wav"
+upload_folder = root_folder + "/audio"
+# Upload limits; larger uploads are rejected with 413 before any analysis
+max_upload_bytes = int(os.environ.get("MAX_UPLOAD_BYTES", 50 * 1024 * 1024))
+max_upload_seconds = float(os.environ.get("MAX_UPLOAD_SECONDS", 600))
+app.config['MAX_CONTENT_LENGTH'] = max_upload_bytes
+scheduler = Scheduler()
+preview_scheduler = Scheduler(workers=preview_workers)
+# Results of progressive requests, until the follow-up fetch
+result_store = ResultStore()
+# Results are written straight to the backend when BACKEND_URL is set and the client asks for it
+result_delivery = ResultDelivery(backend_url) if backend_url else None
+# Sample type carried from decode through feature extraction; "float32" halves memory traffic
+signal_dtype = os.environ.get("SIGNAL_DTYPE", "float64")
+# Pitch engine used by /pitch: "praat" or "fast" (vectorized YIN, ~2x faster than "praat"; see fast_pitch.py for its error)
+pitch_engine = os.environ.get("PITCH_ENGINE", "praat")
+pitch_engines = ("fast", "praat")
+# Share of a full analysis's cost that a /pitch run takes (pitch-only Praat vs the script in pitch_benchmark.py)
+pitch_cost_ratio = 0.25
 # Feature names
 features = [
     "number_of_syllables", "number_of_pauses", "rate_of_speech", "articulation_rate",
@@ -44,8 +73,12 @@ features = [
     "f0_median", "f0_min", "f0_max", "f0_quantile25", "f0_quan75",
     "speech_rate_fluctuation", "pitch_fluctuation", "relative_volume", "ambient_noise"
 ]
+# Values printed by the Praat script, in order
+praat_features = features[:14]
+# Features /process returns when the request does not select any
+default_features = praat_features + ["speech_rate_fluctuation", "volume_fluctuation", "relative_volume", "ambient_noise"]
 
-def split_audio_into_chunks(y, sr, chunk_duration=5.0):
+def split_audio_into_chunks(y, sr, chunk_duration=5.0, prefix="temp_chunk"):
     """
     Split audio into chunks of specified duration.
     
@@ -53,6 +86,7 @@ def split_audio_into_chunks(y, sr, chunk_duration=5.0):
         y: Audio signal
         sr: Sample rate
         chunk_duration: Duration of each chunk in seconds
+        prefix: File name prefix, unique per request so concurrent analyses don't collide
     
     Returns:
         list: List of chunk paths
@@ -67,12 +101,43 @@ def split_audio_into_chunks(y, sr, chunk_duration=5.0):
         # Skip chunks that are too short (less than 1 second)
         if len(chunk) < sr:
             continue
-        chunk_path = os.path.join(root_folder, f"audio/temp_chunk_{i}.wav")
+        chunk_path = os.path.join(root_folder, f"audio/{prefix}_{i}.wav")
         chunk_paths.append(chunk_path)
         sf.write(chunk_path, chunk, sr)
     
     return chunk_paths
 
+def stack_chunks(y, sr, chunk_duration=5.0):
+    """
+    Stack the chunks of a signal into a 2-D array for batched feature extraction.
+    
+    Chunks match split_audio_into_chunks. When every kept chunk is full length
+    the result is a zero-copy view of y; otherwise the shorter last chunk is
+    zero-padded (one copy) and its valid length recorded for masking.
+    
+    Args:
+        y: Audio signal
+        sr: Sample rate
+        chunk_duration: Duration of each chunk in seconds
+    
+    Returns:
+        tuple: (chunks of shape (n_chunks, chunk_size), valid samples per chunk)
+    """
+    chunk_size = int(chunk_duration * sr)
+    n_full = len(y) // chunk_size
+    remainder = len(y) - n_full * chunk_size
+    
+    # Chunks shorter than 1 second are skipped, as in split_audio_into_chunks
+    if remainder < sr:
+        chunks = y[:n_full * chunk_size].reshape(n_full, chunk_size)
+        return chunks, np.full(n_full, chunk_size)
+    
+    chunks = np.zeros((n_full + 1, chunk_size), dtype=y.dtype)
+    chunks.reshape(-1)[:len(y)] = y
+    lengths = np.full(n_full + 1, chunk_size)
+    lengths[-1] = remainder
+    return chunks, lengths
+
 def calculate_chunk_volume(chunk_path, frame_length=2048):
     """
     Calculate volume difference for a single chunk.
@@ -84,37 +149,40 @@ def calculate_chunk_volume(chunk_path, frame_length=2048):
     Returns:
         tuple: (volume_difference, noise_db)
     """
-    y, sr = sf.read(chunk_path)
+    y, sr = sf.read(chunk_path, dtype=signal_dtype)
     return calculate_relative_volume(y, sr, frame_length)
 
-def calculate_speech_rate_fluctuation(audio_path, chunk_duration=5.0):
+def calculate_chunk_speech_rates(audio_path, y, sr, chunk_duration=5.0, cancel=None):
     """
-    Calculate speech rate and volume fluctuations by analyzing chunks of audio.
+    Run the Praat script on each chunk of the audio for its speech rate.
     
     Args:
-        audio_path: Path to the audio file
+        audio_path: Path to the audio file, used to name the chunk files
+        y: Audio signal
+        sr: Sample rate
         chunk_duration: Duration of each chunk in seconds
+        cancel: Optional CancelToken, checked before each chunk
     
     Returns:
-        tuple: (speech_rate_fluctuation, volume_fluctuation, chunk_rates, chunk_volumes)
+        tuple: (chunk_rates, indices of the chunks Praat could analyze)
     """
-
-    # Load audio
-    y, sr = sf.read(audio_path)
-
     logger.info(f'y, sr: {y, sr}')
     
     # Split audio into chunks
-    chunk_paths = split_audio_into_chunks(y, sr, chunk_duration)
+    prefix = os.path.splitext(os.path.basename(audio_path))[0] + "_chunk"
+    chunk_paths = split_audio_into_chunks(y, sr, chunk_duration, prefix)
 
     logger.info(f'chunk_paths: {chunk_paths}')
     
     chunk_rates = []
-    chunk_volumes = []
+    analyzed = []
     
     try:
         # Analyze all chunks
         for i, chunk_path in enumerate(chunk_paths):
+            # Stop between chunks once the request is abandoned
+            if cancel is not None:
+                cancel.check()
             try:
                 # Analyze chunk using Praat for speech rate
                 objects = run_file(praat_script, -20, 2, 0.3, 0, chunk_path, root_folder, 80, 400, 0.01, capture_output=True)
@@ -127,10 +195,7 @@ def calculate_speech_rate_fluctuation(audio_path, chunk_duration=5.0):
                     speech_rate = float(chunk_data[2])
                     chunk_rates.append(speech_rate)
                 
-                # Calculate volume difference for this chunk
-                volume_diff, noise_db = calculate_chunk_volume(chunk_path)  # Get both values
-                chunk_volumes.append(volume_diff)
-                logger.info(f'chunk_volumes: {chunk_volumes}')
+                analyzed.append(i)
                 
             except Exception as e:
                 print(f"Error processing chunk {chunk_path}: {str(e)}")
@@ -141,26 +206,79 @@ def calculate_speech_rate_fluctuation(audio_path, chunk_duration=5.0):
             if os.path.exists(chunk_path):
                 os.remove(chunk_path)
     
-    # Calculate fluctuations
+    return chunk_rates, analyzed
+
+def calculate_chunk_volumes(y, sr, chunk_duration=5.0):
+    """
+    Calculate the volume difference of every chunk in one batched pass.
+    
+    Args:
+        y: Audio signal
+        sr: Sample rate
+        chunk_duration: Duration of each chunk in seconds
+    
+    Returns:
+        ndarray: Volume difference per chunk, aligned with split_audio_into_chunks
+    
+    Errors propagate: an empty result would read as a perfectly stable volume.
+    """
+    # Volume features are defined on a single channel
+    chunk_signals, chunk_lengths = stack_chunks(to_mono(y), sr, chunk_duration)
+    chunk_volumes, _ = calculate_relative_volumes(chunk_signals, chunk_lengths, sr)
+    return chunk_volumes
+
+def speech_rate_fluctuation_of(chunk_rates):
+    """Difference between the fastest and slowest chunk, 0 if no chunk has a rate"""
     if chunk_rates:
-        speech_rate_fluctuation = max(chunk_rates) - min(chunk_rates)  # Difference between max and min
-    else:
-        speech_rate_fluctuation = 0.0
+        return max(chunk_rates) - min(chunk_rates)
+    return 0.0
+
+def volume_fluctuation_of(all_chunk_volumes, analyzed):
+    """
+    Standard deviation of the volume difference over the chunks Praat could analyze.
+    
+    Args:
+        all_chunk_volumes: Volume difference of every chunk
+        analyzed: Indices of the chunks Praat could analyze
+    
+    Returns:
+        tuple: (volume_fluctuation, chunk_volumes)
+    """
+    chunk_volumes = [float(all_chunk_volumes[i]) for i in analyzed]
+    return (np.std(chunk_volumes) if chunk_volumes else 0.0), chunk_volumes
+
+def calculate_speech_rate_fluctuation(audio_path, chunk_duration=5.0, cancel=None, y=None, sr=None):
+    """
+    Calculate speech rate and volume fluctuations by analyzing chunks of audio.
+    
+    Args:
+        audio_path: Path to the audio file
+        chunk_duration: Duration of each chunk in seconds
+        cancel: Optional CancelToken, checked before each chunk
+        y: Already decoded audio signal, to avoid reading the file again
+        sr: Sample rate of y
+    
+    Returns:
+        tuple: (speech_rate_fluctuation, volume_fluctuation, chunk_rates, chunk_volumes)
+    """
+
+    # Load audio
+    if y is None:
+        y, sr = sf.read(audio_path, dtype=signal_dtype)
+
+    # Volume features for all chunks in one batched pass
+    all_chunk_volumes = calculate_chunk_volumes(y, sr, chunk_duration)
+    chunk_rates, analyzed = calculate_chunk_speech_rates(audio_path, y, sr, chunk_duration, cancel)
+    
+    # Calculate fluctuations
+    speech_rate_fluctuation = speech_rate_fluctuation_of(chunk_rates)
 
     logger.info(f'speech_rate_fluctuation: {speech_rate_fluctuation}')
         
-    volume_fluctuation = np.std(chunk_volumes) if chunk_volumes else 0.0
+    # Keep the volume difference of chunks Praat could analyze
+    volume_fluctuation, chunk_volumes = volume_fluctuation_of(all_chunk_volumes, analyzed)
 
     logger.info(f'volume_fluctuation: {volume_fluctuation}')
-
-    # print("\nSummary:")
-    # print(f"Number of chunks analyzed: {len(chunk_volumes)}")
-    # print(f"Volume fluctuation (std dev): {volume_fluctuation:.2f} dB")
-    # print(f"Speech rate fluctuation (max-min): {speech_rate_fluctuation:.2f} syllables/sec")
-    # print(f"Max speech rate: {max(chunk_rates):.2f if chunk_rates else 0} syllables/sec")
-    # print(f"Min speech rate: {min(chunk_rates):.2f if chunk_rates else 0} syllables/sec")
-    # print(f"Average volume difference: {np.mean(chunk_volumes):.2f if chunk_volumes else 0} dB")
-    # print(f"Average speech rate: {np.mean(chunk_rates):.2f if chunk_rates else 0} syllables/sec")
         
     return speech_rate_fluctuation, volume_fluctuation, chunk_rates, chunk_volumes
 
@@ -205,143 +323,778 @@ def classify_ambient_noise(noise_db):
     else:  # High background noise
         return "noisy"
 
-def calculate_relative_volume(y, sr, frame_length=2048):
+def mean_power_db(energy, count):
     """
-    Calculate the volume difference between speech and noise segments.
+    Convert sums of squared samples to RMS levels in dB.
     
     Args:
-        y: Audio signal
+        energy: Sum of squared samples (scalar or array)
+        count: Number of samples (scalar or array)
+    
+    Returns:
+        ndarray: 20 * log10(rms), or -inf where there are no samples
+    """
+    energy = np.asarray(energy, dtype=np.float64)
+    count = np.asarray(count, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(count > 0, 10 * np.log10(energy / count), -np.inf)
+
+def amplitude_to_db_rows(amplitude, valid=None, amin=1e-5, top_db=80.0):
+    """
+    librosa.amplitude_to_db applied to each row independently, so the top_db
+    floor is relative to the row's own maximum rather than the whole batch.
+    
+    Args:
+        amplitude: Amplitudes, rows along the first axes
+        valid: Optional mask of entries that count towards each row's maximum
+        amin: Minimum amplitude
+        top_db: Dynamic range below the row maximum
+    
+    Returns:
+        ndarray: Levels in dB
+    """
+    db = 20 * np.log10(np.maximum(amin, np.abs(amplitude)))
+    peak = np.max(db, axis=-1, keepdims=True, where=True if valid is None else valid, initial=-np.inf)
+    return np.maximum(db, peak - top_db)
+
+def batch_spectral_centroid(y, sr, hop_length, n_fft=2048):
+    """
+    librosa.feature.spectral_centroid for a 2-D batch of signals, reduced with
+    a single einsum over the frequency axis instead of per-column normalisation.
+    
+    Args:
+        y: Audio signals of shape (n_chunks, n_samples)
         sr: Sample rate
-        frame_length: Frame length for analysis
+        hop_length: Hop length
+        n_fft: FFT size
     
     Returns:
-        tuple: (volume_difference, noise_db)
+        ndarray: Centroid in Hz of shape (n_chunks, n_frames)
     """
-    logger.info('calculate_relative_volume')
+    S = np.abs(librosa.stft(y, n_fft=n_fft, hop_length=hop_length))
+    freq = librosa.fft_frequencies(sr=sr, n_fft=n_fft).astype(S.dtype)
+    weighted = np.einsum('f,...ft->...t', freq, S)
+    total = S.sum(axis=-2)
+    # Silent frames are left unnormalised, as librosa does
+    return np.where(total > np.finfo(S.dtype).tiny, weighted / np.maximum(total, np.finfo(S.dtype).tiny), weighted)
+
+def batch_zero_crossing_rate(y, frame_length, hop_length, threshold=1e-10):
+    """
+    librosa.feature.zero_crossing_rate (centered, edge-padded) for a 2-D batch
+    of signals. Sign changes are counted once per sample and summed per frame
+    from a running count, rather than re-scanned in every overlapping frame.
+    
+    Args:
+        y: Audio signals of shape (n_chunks, n_samples)
+        frame_length: Frame length
+        hop_length: Hop length
+        threshold: Magnitudes at or below this count as zero
+    
+    Returns:
+        ndarray: Zero-crossing rate of shape (n_chunks, n_frames)
+    """
+    pad = frame_length // 2
+    y = np.pad(y, [(0, 0), (pad, pad)], mode='edge')
+    sign = np.signbit(y) & (np.abs(y) > threshold)
+    changes = np.zeros(sign.shape, dtype=np.int32)
+    np.cumsum(sign[:, 1:] != sign[:, :-1], axis=-1, out=changes[:, 1:])
+    
+    # Crossings inside frame [start, start + frame_length)
+    n_frames = 1 + (y.shape[-1] - frame_length) // hop_length
+    starts = np.arange(n_frames) * hop_length
+    return (changes[:, starts + frame_length - 1] - changes[:, starts]) / frame_length
 
-    # Create preprocessed version for analysis
-    y_processed = librosa.effects.preemphasis(y.copy())
+def calculate_volume_frames(chunks, lengths, sr, frame_length=2048):
+    """
+    Frame-level features the speech/noise split is based on, for every row of
+    a 2-D signal.
+    
+    Args:
+        chunks: Audio signals of shape (n_chunks, chunk_size)
+        lengths: Valid samples per row; samples past this are padding and masked out
+        sr: Sample rate
+        frame_length: Frame length for analysis
+    
+    Returns:
+        dict: Preemphasized signal, rms, spectral_centroid and zero_crossing_rate
+            of shape (n_chunks, n_frames), and hop_length
+    """
+    chunk_size = chunks.shape[-1]
+    lengths = np.asarray(lengths)
 
-    logger.info(f'y_processed: {y_processed}')
+    # Create preprocessed version for analysis (preemphasis runs per row and returns a new array)
+    y_processed = librosa.effects.preemphasis(chunks)
+    padded = lengths < chunk_size
+    if padded.any():
+        y_processed[np.arange(chunk_size) >= lengths[:, np.newaxis]] = 0
     
     # Calculate features with 75% overlap
     hop_length = frame_length // 4
-    rms = librosa.feature.rms(y=y_processed, frame_length=frame_length, hop_length=hop_length)[0]
+    return {
+        "y_processed": y_processed,
+        "rms": librosa.feature.rms(y=y_processed, frame_length=frame_length, hop_length=hop_length)[..., 0, :],
+        "spectral_centroid": batch_spectral_centroid(y_processed, sr, hop_length),
+        "zero_crossing_rate": batch_zero_crossing_rate(y_processed, frame_length, hop_length),
+        "hop_length": hop_length,
+    }
 
-    logger.info(f'rms: {rms}')
+def calculate_relative_volumes(chunks, lengths, sr, frame_length=2048, frames=None):
+    """
+    Calculate the volume difference between speech and noise for every row of
+    a 2-D signal in one batched pass.
+    
+    Args:
+        chunks: Audio signals of shape (n_chunks, chunk_size)
+        lengths: Valid samples per row; samples past this are padding and masked out
+        sr: Sample rate
+        frame_length: Frame length for analysis
+        frames: Result of calculate_volume_frames for the same signal, if already computed
+    
+    Returns:
+        tuple: (volume_differences, noise_dbs), one value per row
+    """
+    logger.info('calculate_relative_volumes')
 
-    spectral_centroid = librosa.feature.spectral_centroid(y=y_processed, sr=sr, hop_length=hop_length)[0]
+    n_chunks, chunk_size = chunks.shape
+    lengths = np.asarray(lengths)
+    if n_chunks == 0:
+        return np.empty(0), np.empty(0)
 
-    logger.info(f'specral_centroid: {spectral_centroid}')
+    if frames is None:
+        frames = calculate_volume_frames(chunks, lengths, sr, frame_length)
+    y_processed = frames["y_processed"]
+    rms = frames["rms"]
+    spectral_centroid = frames["spectral_centroid"]
+    zero_crossing = frames["zero_crossing_rate"]
+    hop_length = frames["hop_length"]
 
-    zero_crossing = librosa.feature.zero_crossing_rate(y=y_processed, frame_length=frame_length, hop_length=hop_length)[0]
-    
-    logger.info(f'zero_crossing: {zero_crossing}')
+    # Frames past a row's valid samples only see padding
+    n_frames = rms.shape[-1]
+    frame_index = np.arange(n_frames)
+    valid_frames = frame_index < (1 + lengths[:, np.newaxis] // hop_length)
 
     # Adaptive threshold calculation
-    noise_sample = y_processed[:int(0.5*sr)]
+    noise_sample = y_processed[:, :int(0.5*sr)]
 
-    noise_rms = librosa.feature.rms(y=noise_sample, frame_length=frame_length)[0]
-    threshold_db = librosa.amplitude_to_db(np.percentile(noise_rms, 50)) + 2
+    noise_rms = librosa.feature.rms(y=noise_sample, frame_length=frame_length)[..., 0, :]
+    threshold_db = amplitude_to_db_rows(np.percentile(noise_rms, 50, axis=-1)[:, np.newaxis]) + 2
     
     # Convert features to compatible dimensions
-    rms_db = librosa.amplitude_to_db(rms)
-    times = librosa.times_like(rms, sr=sr, hop_length=hop_length)
+    rms_db = amplitude_to_db_rows(rms, valid_frames)
     
     # Speech detection
     speech_frames = (
         (rms_db > threshold_db) &
         ((spectral_centroid > 1100) |
          (zero_crossing < 0.15))
-    )
+    ) & valid_frames
+    noise_frames = valid_frames & ~speech_frames
     
-    # Collect speech and noise samples
-    speech_samples = []
-    noise_samples = []
+    # Sum of squares of the hop-sized segment each frame covers, computed on
+    # strided views of the chunks so no squared or concatenated copies are made
+    n_full = min(chunk_size // hop_length, n_frames)
+    segment_energy = np.zeros((n_chunks, n_frames))
+    blocks = np.lib.stride_tricks.sliding_window_view(chunks, hop_length, axis=-1)[:, ::hop_length][:, :n_full]
+    segment_energy[:, :n_full] = np.einsum('ijk,ijk->ij', blocks, blocks)
+    if n_full < n_frames:
+        tail = chunks[:, n_full * hop_length:(n_full + 1) * hop_length]
+        segment_energy[:, n_full] = np.einsum('ij,ij->i', tail, tail)
+    segment_length = np.clip(lengths[:, np.newaxis] - frame_index * hop_length, 0, hop_length)
     
-    for i in range(len(speech_frames)):
-        start_sample = int(times[i] * sr)
-        end_sample = int(min((times[i] + hop_length/sr) * sr, len(y)))
-        frame = y[start_sample:end_sample]
-        
-        if speech_frames[i]:
-            speech_samples.append(frame)
-        else:
-            noise_samples.append(frame)
+    # Calculate RMS values of the speech and noise partitions
+    speech_vol_db = mean_power_db((segment_energy * speech_frames).sum(axis=-1), (segment_length * speech_frames).sum(axis=-1))
+    noise_vol_db = mean_power_db((segment_energy * noise_frames).sum(axis=-1), (segment_length * noise_frames).sum(axis=-1))
     
-    # Calculate RMS values
-    if speech_samples:
-        speech_concat = np.concatenate(speech_samples)
-        speech_rms = np.sqrt(np.mean(speech_concat**2))
-        speech_vol_db = 20 * np.log10(speech_rms)
-    else:
-        speech_vol_db = -np.inf
-        
-    if noise_samples:
-        noise_concat = np.concatenate(noise_samples)
-        noise_rms = np.sqrt(np.mean(noise_concat**2))
-        noise_vol_db = 20 * np.log10(noise_rms)
+    return speech_vol_db - noise_vol_db, noise_vol_db
+
+def to_mono(y):
+    """Average the channels of a multichannel signal, keeping its sample type"""
+    if y.ndim > 1:
+        return y.mean(axis=1, dtype=y.dtype)
+    return y
+
+def calculate_relative_volume(y, sr, frame_length=2048, frames=None):
+    """
+    Calculate the volume difference between speech and noise segments.
+    
+    Args:
+        y: Audio signal
+        sr: Sample rate
+        frame_length: Frame length for analysis
+        frames: calculate_volume_frames of the mono signal as a one-row batch, if already computed
+    
+    Returns:
+        tuple: (volume_difference, noise_db)
+    """
+    logger.info('calculate_relative_volume')
+
+    # Features are defined on a single channel
+    y = to_mono(y)
+
+    volume_differences, noise_dbs = calculate_relative_volumes(y[np.newaxis, :], [len(y)], sr, frame_length, frames)
+    return volume_differences[0], noise_dbs[0]
+
+def calculate_praat_pitch(audio_path):
+    """
+    Calculate f0 statistics with Praat, using the same queries as the Praat script.
+    
+    Args:
+        audio_path: Path to the audio file
+    
+    Returns:
+        dict: Pitch statistics keyed by feature name
+    """
+    sound = parselmouth.Sound(audio_path)
+    pitch = call(sound, "To Pitch", 0.01, 80, 400)
+    values = [
+        call(pitch, "Get mean", 0, 0, "Hertz"),
+        call(pitch, "Get standard deviation", 0, 0, "Hertz"),
+        call(pitch, "Get quantile", 0, 0, 0.50, "Hertz"),
+        call(pitch, "Get minimum", 0, 0, "Hertz", "Parabolic"),
+        call(pitch, "Get maximum", 0, 0, "Hertz", "Parabolic"),
+        call(pitch, "Get quantile", 0, 0, 0.25, "Hertz"),
+        call(pitch, "Get quantile", 0, 0, 0.75, "Hertz"),
+    ]
+    # Praat reports undefined (NaN) when no frame is voiced
+    return {name: round(float(value), 2) if np.isfinite(value) else 0.0
+            for name, value in zip(pitch_features, values)}
+
+def detect_syllable_nuclei(sound, intensity, silence_db=-20, min_dip=2, min_pause=0.3):
+    """
+    Syllable nuclei and sounding intervals, as the Praat script finds them.
+    
+    Port of the peak picking in myspsolution.praat: intensity peaks above a
+    threshold, separated by a dip of at least min_dip dB, inside sounding
+    intervals and voiced. The count matches number_of_syllables.
+    
+    Args:
+        sound: parselmouth Sound
+        intensity: Intensity of the sound ("To Intensity", 50, 0, "yes")
+        silence_db: Silence threshold relative to the 99% intensity quantile
+        min_dip: Minimum dip between peaks in dB
+        min_pause: Minimum pause duration in seconds
+    
+    Returns:
+        tuple: (nucleus times, sounding intervals of shape (n, 2)), in seconds
+    """
+    min_int = call(intensity, "Get minimum", 0, 0, "Parabolic")
+    max_int = call(intensity, "Get maximum", 0, 0, "Parabolic")
+    max99_int = call(intensity, "Get quantile", 0, 0, 0.99)
+
+    # Estimate intensity thresholds
+    threshold = max(max99_int + silence_db, min_int)
+    silence_threshold = silence_db - (max_int - max99_int)
+
+    # Pauses (silences) and sounding intervals
+    textgrid = call(intensity, "To TextGrid (silences)", silence_threshold, min_pause, 0.1, "silent", "sounding")
+    n_intervals = call(textgrid, "Get number of intervals", 1)
+    sounding = [(call(textgrid, "Get start time of interval", 1, i), call(textgrid, "Get end time of interval", 1, i))
+                for i in range(1, n_intervals + 1) if call(textgrid, "Get label of interval", 1, i) == "sounding"]
+
+    # Candidate peaks: intensity maxima above the threshold
+    intensity_sound = call(call(intensity, "Down to Matrix"), "To Sound (slice)", 1)
+    points = call(intensity_sound, "To PointProcess (extrema)", "Left", "yes", "no", "Sinc70")
+    peaks = []
+    for i in range(1, call(points, "Get number of points") + 1):
+        t = call(points, "Get time from index", i)
+        value = call(intensity_sound, "Get value at time", 1, t, "Cubic")
+        if value > threshold:
+            peaks.append((t, value))
+
+    # Keep peaks followed by a dip of more than min_dip
+    valid_peaks = []
+    if peaks:
+        current_time, current_int = peaks[0]
+        for p in range(len(peaks) - 1):
+            following_time = peaks[p + 1][0]
+            dip = call(intensity, "Get minimum", current_time, following_time, "None")
+            if abs(current_int - dip) > min_dip:
+                valid_peaks.append(peaks[p][0])
+            current_time = following_time
+            current_int = call(intensity, "Get value at time", following_time, "Cubic")
+
+    # Keep voiced peaks inside sounding intervals
+    pitch = call(sound, "To Pitch (ac)", 0.02, 30, 4, "no", 0.03, 0.25, 0.01, 0.35, 0.25, 450)
+    nuclei = []
+    for t in valid_peaks:
+        interval = call(textgrid, "Get interval at time", 1, t)
+        if call(textgrid, "Get label of interval", 1, interval) != "sounding":
+            continue
+        if np.isfinite(call(pitch, "Get value at time", t, "Hertz", "Linear")):
+            nuclei.append(t)
+
+    # Correct for the time shift of the intensity object versus the sound
+    time_correction = sound.get_total_duration() / intensity_sound.get_total_duration()
+    return np.array(nuclei) * time_correction, np.array(sounding).reshape(-1, 2)
+
+def calculate_praat_tracks(audio_path):
+    """
+    Frame-level Praat tracks of a recording, with the script's settings.
+    
+    Args:
+        audio_path: Path to the audio file
+    
+    Returns:
+        tuple: (track name to array, track name to time axis)
+    """
+    sound = parselmouth.Sound(audio_path)
+    pitch = call(sound, "To Pitch", 0.01, 80, 400)
+    intensity = call(sound, "To Intensity", 50, 0, "yes")
+    nuclei, sounding = detect_syllable_nuclei(sound, intensity)
+
+    # Unvoiced frames are stored as NaN
+    f0 = pitch.selected_array["frequency"]
+    f0[f0 == 0] = np.nan
+
+    tracks = {
+        "pitch": f0,
+        "intensity": intensity.values[0],
+        "syllable_nuclei": nuclei,
+        "sounding": sounding,
+    }
+    axes = {
+        "pitch": {"start": float(pitch.xs()[0]), "step": pitch.time_step, "unit": "Hz"},
+        "intensity": {"start": float(intensity.xs()[0]), "step": intensity.time_step, "unit": "dB"},
+        "syllable_nuclei": {"unit": "s"},
+        "sounding": {"unit": "s"},
+    }
+    return tracks, axes
+
+def analyze_pitch_file(audio_path, engine):
+    """Calculate only the f0 statistics and pitch fluctuation of the uploaded file"""
+    
+    logger.info(f'analyze_pitch_file: {engine}')
+
+    if engine == "praat":
+        json_dict = calculate_praat_pitch(audio_path)
     else:
-        noise_vol_db = -np.inf
+        json_dict = analyze_pitch(audio_path)
+
+    json_dict["pitch_fluctuation"] = calculate_pitch_fluctuation(json_dict["f0_min"], json_dict["f0_max"])
+    json_dict["pitch_engine"] = engine
+
+    return json_dict
+
+class NoisySpeechDetected(Exception):
+    """Raised when the Praat script rejects a recording as noise or unnatural speech"""
+
+# Stages of /process and the features derived from them; a request runs only what its features need
+feature_graph = FeatureGraph()
+
+@feature_graph.node("signal")
+def load_signal(context):
+    y, sr = sf.read(context.audio_path, dtype=signal_dtype)
+    logger.info(f"Audio loaded successfully: {y.shape}, {sr}")
+    return y, sr
+
+@feature_graph.node("praat_summary")
+def run_praat_summary(context):
+    # Main Praat analysis of the whole file
+    objects = run_file(praat_script, -20, 2, 0.3, 0, context.audio_path, root_folder, 80, 400, 0.01, capture_output=True)
+    z1 = str(objects[1])
+
+    logger.info(f'objects: {objects}')
+
+    if z1 == "A noisy background or unnatural-sounding speech detected. No result try again\n":
+        raise NoisySpeechDetected("Noisy background or unnatural-sounding speech detected, analysis failed")
+
+    return dict(zip(praat_features, z1.strip().split()))
+
+for name in praat_features:
+    feature_graph.node(name, "praat_summary", output=True)(lambda context, summary, name=name: summary[name])
+
+@feature_graph.node("pitch_fluctuation", "praat_summary", output=True)
+def pitch_fluctuation_feature(context, summary):
+    return calculate_pitch_fluctuation(summary["f0_min"], summary["f0_max"])
+
+@feature_graph.node("chunk_speech_rates", "signal")
+def chunk_speech_rates_stage(context, signal):
+    y, sr = signal
+    return calculate_chunk_speech_rates(context.audio_path, y, sr, cancel=context.cancel)
+
+@feature_graph.node("chunk_volumes", "signal")
+def chunk_volumes_stage(context, signal):
+    y, sr = signal
+    return calculate_chunk_volumes(y, sr)
+
+@feature_graph.node("speech_rate_fluctuation", "chunk_speech_rates", output=True)
+def speech_rate_fluctuation_feature(context, chunk_speech_rates):
+    chunk_rates, _ = chunk_speech_rates
+    return float(speech_rate_fluctuation_of(chunk_rates))
+
+# Volume fluctuation only counts chunks Praat could analyze, so it needs the per-chunk Praat runs too
+@feature_graph.node("volume_fluctuation", "chunk_speech_rates", "chunk_volumes", output=True)
+def volume_fluctuation_feature(context, chunk_speech_rates, chunk_volumes):
+    _, analyzed = chunk_speech_rates
+    volume_fluctuation, _ = volume_fluctuation_of(chunk_volumes, analyzed)
+    return float(volume_fluctuation)
+
+@feature_graph.node("volume_frames", "signal")
+def volume_frames_stage(context, signal):
+    y, sr = signal
+    y = to_mono(y)
+    return calculate_volume_frames(y[np.newaxis, :], [len(y)], sr)
+
+@feature_graph.node("whole_volume", "signal", "volume_frames")
+def whole_volume_stage(context, signal, volume_frames):
+    y, sr = signal
+    relative_volume, noise_db = calculate_relative_volume(y, sr, frames=volume_frames)
+    logger.info(f'relative_volume, noise_db: {relative_volume, noise_db}')
+    return relative_volume, noise_db
+
+@feature_graph.node("relative_volume", "whole_volume", output=True)
+def relative_volume_feature(context, whole_volume):
+    return float(whole_volume[0])
+
+@feature_graph.node("ambient_noise", "whole_volume", output=True)
+def ambient_noise_feature(context, whole_volume):
+    return classify_ambient_noise(whole_volume[1])
+
+# Frame-level tracks for the contour store; not a selectable feature
+@feature_graph.node("frame_tracks", "signal", "volume_frames")
+def frame_tracks_stage(context, signal, volume_frames):
+    y, sr = signal
+    tracks, axes = calculate_praat_tracks(context.audio_path)
+    frame_step = volume_frames["hop_length"] / sr
+    for name in ("rms", "spectral_centroid", "zero_crossing_rate"):
+        tracks[name] = volume_frames[name][0]
+        axes[name] = {"start": 0.0, "step": frame_step}
+    meta = {"duration": len(y) / sr, "sample_rate": sr, "tracks": axes}
+    return tracks, meta
+
+def store_contours(recording_id, frame_tracks):
+    """Persist frame tracks; a failure is logged and does not fail the analysis"""
+    tracks, meta = frame_tracks
+    try:
+        path = save_contours(recording_id, tracks, meta)
+        logger.info(f'Stored contours of {recording_id} in {path}')
+        return True
+    except (OSError, ValueError) as e:
+        logger.error(f'Could not store contours of {recording_id}: {str(e)}')
+        return False
+
+def parse_features(value):
+    """
+    Parse a comma-separated feature selection.
     
-    return speech_vol_db - noise_vol_db, noise_vol_db
+    Args:
+        value: Feature names, or None for the default set
+    
+    Returns:
+        list: Feature names in evaluation order
+    
+    Raises:
+        ValueError: If a name is not a known feature
+    """
+    if not value:
+        return default_features
+
+    names = {name.strip() for name in value.split(",") if name.strip()}
+    unknown = sorted(names.difference(feature_graph.outputs))
+    if unknown:
+        raise ValueError(f"Unknown features: {', '.join(unknown)}")
+    # Praat features first, so a rejected recording fails before the slower stages run
+    return [name for name in feature_graph.outputs if name in names]
 
-def analyze_audio_file():
-    """Analyze audio file and return metrics including speech rate and volume fluctuations"""
+def analyze_audio_file(audio_path, cancel=None, requested=None, recording_id=None):
+    """
+    Analyze audio file and return metrics including speech rate and volume fluctuations.
+    
+    Args:
+        audio_path: Path to the audio file
+        cancel: Optional CancelToken, checked between stages
+        requested: Feature names to compute, default_features if None
+        recording_id: If set, frame-level tracks are also stored under this ID
+    
+    Returns:
+        dict: Feature values, or an error message
+    """
     
     logger.info('analyze_audio_file')
     
-    logger.info(f'output_path: {output_path}')
+    logger.info(f'audio_path: {audio_path}')
+
+    if not os.path.exists(audio_path):
+        logger.error(f"File not found: {audio_path}")
+
+    requested = default_features if requested is None else requested
+    nodes = requested + ["frame_tracks"] if recording_id else requested
+    logger.info(f'Stages: {feature_graph.requirements(nodes)}')
 
     try:
-        if not os.path.exists(output_path):
-            logger.error(f"File not found: {output_path}")
-        else:
-            logger.info(f"File found: {output_path}, attempting to load...")
+        json_dict = feature_graph.evaluate(nodes, SimpleNamespace(audio_path=audio_path, cancel=cancel))
+    except NoisySpeechDetected as e:
+        return {"error": str(e)}
 
-        y, sr = sf.read(output_path)
-        logger.info(f"Audio loaded successfully: {y.shape}, {sr}")
+    if recording_id:
+        frame_tracks = json_dict.pop("frame_tracks")
+        if store_contours(recording_id, frame_tracks):
+            json_dict["contours"] = recording_id
 
-    except Exception as e:
-        logger.error(f"Error loading audio file {output_path}: {e}")
-        y, sr = None, None  # Assign None to avoid undefined variables
-        logger.info(f'y, sr: {y, sr}')
-        
-    # Run main Praat analysis first to get all metrics
-    objects = run_file(praat_script, -20, 2, 0.3, 0, output_path, root_folder, 80, 400, 0.01, capture_output=True)
-    z1=str(objects[1])
+    logger.info(f'json_dict: {json_dict}')
 
-    logger.info(f'objects: {object}')
+    return json_dict
 
-    if z1 == "A noisy background or unnatural-sounding speech detected. No result try again\n":
-        return {"error": "Noisy background or unnatural-sounding speech detected, analysis failed"}
+def profiled_analysis(profile_id, request_id, func, *args):
+    """
+    Run an analysis function under cProfile.
     
-    z2=z1.strip().split()
-    z3=np.array(z2)
-    z4=np.array(z3)[np.newaxis]
-    z5=z4.T
-    z5_single = z5[:, 0]
+    Args:
+        profile_id: ID the profile is saved under
+        request_id: Request the analysis belongs to, logged for correlation
+        func: Analysis function
     
-    # Create dictionary with original features
-    json_dict = dict(zip(features, z5_single))  # Exclude the last three features
+    Returns:
+        tuple: (function result, whether a profile was saved)
+    """
+    result, saved = profile_call(profile_id, func, *args)
+    if saved:
+        logger.info(f'Saved profile {profile_id} for request {request_id}')
+    else:
+        logger.warning(f'Profiler busy, request {request_id} ran unprofiled')
+    return result, saved
 
-    logger.info(f'json_dict: {json_dict}')
+def run_analysis(func, *args):
+    """Run an analysis function, under cProfile if the request opted in or was sampled"""
+    if not g.profile:
+        return func(*args)
+
+    result, g.profiled = profiled_analysis(g.profile_id, g.request_id, func, *args)
+    return result
+
+def admin_authorized():
+    """Admin routes need X-Admin-Token when ADMIN_TOKEN is set, otherwise a local client"""
+    token = os.environ.get("ADMIN_TOKEN")
+    if token:
+        return request.headers.get("X-Admin-Token") == token
+    return request.remote_addr in ("127.0.0.1", "::1")
+
+@app.before_request
+def assign_request_id():
+    g.request_id = new_request_id(request.headers)
+    # Decided once, so every analysis stage of a request is profiled or none is
+    g.profile = should_profile(request.headers)
+    g.profile_id = new_profile_id() if g.profile else None
+    g.profiled = False
+
+@app.after_request
+def add_request_id(response):
+    response.headers["X-Request-ID"] = g.request_id
+    if g.profiled:
+        response.headers["X-Profile-ID"] = g.profile_id
+    return response
+
+def save_upload(audio_file):
+    """
+    Save an upload under a new server-generated name and read its duration from the header.
+    
+    The name must not come from the client: two requests carrying the same
+    X-Request-ID would otherwise share (and delete) each other's files.
     
-    # Calculate speech rate and volume fluctuations last (slower calculation)
-    speech_rate_fluctuation, volume_fluctuation, chunk_rates, chunk_volumes = calculate_speech_rate_fluctuation(output_path)
-    json_dict["speech_rate_fluctuation"] = float(speech_rate_fluctuation)
-    json_dict["volume_fluctuation"] = float(volume_fluctuation)
+    Args:
+        audio_file: Uploaded file
     
-    logger.info(f'speech_rate_fluctuation: {speech_rate_fluctuation, volume_fluctuation, chunk_rates, chunk_volumes}')
+    Returns:
+        tuple: (audio_path, duration in seconds, or None if the format is unreadable)
+    """
+    audio_path = os.path.join(upload_folder, f"upload_{uuid.uuid4().hex}.wav")
+    audio_file.save(audio_path)
+    try:
+        return audio_path, sf.info(audio_path).duration
+    except RuntimeError:
+        return audio_path, None
 
-    # Calculate and add overall relative volume and ambient noise
-    relative_volume, noise_db = calculate_relative_volume(y, sr)
-    json_dict["relative_volume"] = float(relative_volume)
-    json_dict["ambient_noise"] = classify_ambient_noise(noise_db)
+def request_seconds(value, default, limit):
+    """
+    Parse a duration in seconds from a header or query value.
     
-    logger.info(f'relative_volume, noise_db: {relative_volume, noise_db}')
+    Args:
+        value: Raw value, or None if absent
+        default: Used for absent, malformed, infinite or NaN values
+        limit: Upper bound of the result
+    
+    Returns:
+        float: Seconds between 0 and limit
+    """
+    try:
+        seconds = float(value) if value is not None else default
+    except ValueError:
+        seconds = default
+    # NaN would slip through min/max and disable every deadline comparison
+    if not math.isfinite(seconds):
+        seconds = default
+    return min(max(seconds, 0.0), limit)
 
-    return json_dict
+def request_deadline():
+    """Deadline in seconds from X-Deadline-Seconds or ?deadline=, capped at MAX_REQUEST_DEADLINE_SECONDS"""
+    value = request.headers.get('X-Deadline-Seconds', request.args.get('deadline'))
+    return request_seconds(value, default_deadline, max_deadline)
+
+def rejection_response(e):
+    """Response for an AdmissionRejected: 503 with Retry-After if waiting helps, otherwise 422"""
+    if e.retry_after is None:
+        return jsonify({"error": str(e)}), 422
+    return jsonify({"error": str(e)}), 503, {'Retry-After': str(e.retry_after)}
+
+def check_upload(duration):
+    """Return an error response for unreadable or over-long uploads, otherwise None"""
+    if duration is None:
+        return jsonify({"error": "Unsupported or corrupt audio file"}), 400
+    if duration > max_upload_seconds:
+        return jsonify({"error": f"Recording is {duration:.0f} s long, the limit is {max_upload_seconds:.0f} s"}), 413
+    return None
+
+def queue_delivery(analysis_result, form):
+    """
+    Queue an analysis result for delivery to the backend's /api/speechData.
+    
+    The request must carry user_id and thresholds (JSON) form fields;
+    recording_url is optional.
+    
+    Args:
+        analysis_result: Result from analyze_audio_file
+        form: The request's form fields
+    
+    Returns:
+        dict: Delivery status to include in the response
+    """
+    if result_delivery is None:
+        return {"status": "unavailable", "error": "Direct delivery is not configured"}
+
+    user_id = form.get('user_id')
+    if not user_id:
+        return {"status": "rejected", "error": "user_id is required for delivery"}
+    if not valid_object_id(user_id):
+        return {"status": "rejected", "error": "user_id must be a 24-character hex ObjectId"}
+
+    try:
+        thresholds = json.loads(form.get('thresholds', ''))
+        document = to_speech_data(analysis_result, user_id, thresholds, form.get('recording_url'))
+    except (ValueError, KeyError, TypeError) as e:
+        return {"status": "rejected", "error": f"Could not build speech data: {str(e)}"}
+
+    if not result_delivery.submit(document):
+        return {"status": "dropped", "error": "Delivery queue is full"}
+    return {"status": "queued"}
+
+def remove_upload(audio_path):
+    if audio_path is not None and os.path.exists(audio_path):
+        os.remove(audio_path)
+
+def request_flag(name):
+    return request.values.get(name, '').lower() in ('1', 'true', 'yes')
+
+def refine_result(result_id, audio_path, duration, deadline, requested, recording_id, form, profile_id=None, request_id=None):
+    """
+    Run the full analysis of a progressive request and store the final result.
+    
+    Runs on a background thread, which owns the upload from here on.
+    
+    Args:
+        result_id: Result ID the result is stored under
+        audio_path: Path to the upload
+        duration: Audio duration in seconds
+        deadline: Seconds the full analysis may take, including queueing
+        requested: Feature names to compute
+        recording_id: Contour store key, or None
+        form: Form fields for delivery, or None if the result is not delivered
+        profile_id: ID to save a cProfile profile under, or None to run unprofiled
+        request_id: Request the refinement belongs to, logged with its profile
+    """
+    try:
+        # The client has its quick estimate and may disconnect, so only the deadline cancels
+        cancel = CancelToken(deadline)
+        analysis_args = (analyze_audio_file, audio_path, cancel, requested, recording_id)
+        if profile_id is None:
+            analysis_result = scheduler.run(duration, cancel, *analysis_args, learn_cost=requested == default_features and not recording_id)
+        else:
+            analysis_result, saved = scheduler.run(duration, cancel, profiled_analysis, profile_id, request_id, *analysis_args, learn_cost=False)
+            if saved:
+                analysis_result["profile_id"] = profile_id
+        if "error" in analysis_result:
+            logger.warning(f'Refinement of {result_id} failed: {analysis_result["error"]}')
+            result_store.put(result_id, "failed", analysis_result)
+            return
+
+        if form is not None:
+            analysis_result["delivery"] = queue_delivery(analysis_result, form)
+        result_store.put(result_id, "final", analysis_result)
+        logger.info(f'Final result of {result_id}: {analysis_result}')
+
+    except (AdmissionRejected, AnalysisCancelled) as e:
+        logger.warning(f'Refinement of {result_id} stopped: {str(e)}')
+        result_store.put(result_id, "failed", {"error": f"Analysis cancelled: {str(e)}"})
+
+    except Exception as e:
+        logger.error(f'Error refining {result_id}: {str(e)}', exc_info=True)
+        result_store.put(result_id, "failed", {"error": f"Processing failed: {str(e)}"})
+
+    finally:
+        remove_upload(audio_path)
+
+def start_progressive(audio_path, duration, preview, budget, requested, recording_id):
+    """
+    Answer a progressive request with a quick estimate and refine it in the background.
+    
+    The first `preview` seconds are analyzed within the latency budget; if
+    that cannot finish in time the response only carries the result ID.
+    Totals that only describe the excerpt are left out of the estimate, and
+    analyzed_seconds says how much of the recording it covers.
+    
+    Args:
+        audio_path: Path to the upload, handed over to the refinement thread
+        duration: Audio duration in seconds
+        preview: Seconds of audio to analyze for the estimate
+        budget: Latency budget in seconds
+        requested: Feature names to compute
+        recording_id: Contour store key, or None
+    
+    Returns:
+        Response with status "approximate" or "pending"
+    """
+    # Unguessable, unlike the client-supplied request ID, so only the uploader can fetch the result
+    result_id = uuid.uuid4().hex
+    preview_path = os.path.splitext(audio_path)[0] + "_preview.wav"
+    approximate = None
+    analyzed = 0.0
+    try:
+        analyzed = write_preview(audio_path, preview, preview_path)
+        cancel = CancelToken(budget, request.environ.get('werkzeug.socket'))
+        # An excerpt under a tight budget says little about full analyses, so it does not refine the cost model
+        approximate = preview_scheduler.run(analyzed, cancel, run_analysis, analyze_audio_file, preview_path, cancel, requested,
+                                            learn_cost=False)
+        if "error" in approximate:
+            logger.warning(f'No estimate for {result_id}: {approximate["error"]}')
+            approximate = None
+        else:
+            approximate = approximate_result(approximate, analyzed)
+    except (AdmissionRejected, AnalysisCancelled) as e:
+        logger.warning(f'No estimate for {result_id} within {budget} s: {str(e)}')
+    except Exception as e:
+        # The estimate is best effort; the full analysis still gets its chance
+        logger.error(f'Error estimating {result_id}: {str(e)}', exc_info=True)
+        approximate = None
+    finally:
+        remove_upload(preview_path)
+
+    status = "approximate" if approximate else "pending"
+    result_store.put(result_id, status, approximate)
+
+    form = request.form.to_dict() if request_flag('deliver') else None
+    # The refinement's profile is saved separately from the estimate's, and named in its final result
+    profile_id = new_profile_id() if g.profile else None
+    refinement = threading.Thread(
+        target=refine_result,
+        args=(result_id, audio_path, duration, request_deadline(), requested, recording_id, form, profile_id, g.request_id),
+        daemon=True,
+    )
+
+    response = jsonify(dict(approximate or {}, status=status, result_id=result_id,
+                            result_url=url_for('get_result', result_id=result_id)))
+    response.status_code = 202
+    # Praat holds the GIL while it runs, so start the refinement only once the estimate is sent
+    response.call_on_close(refinement.start)
+    return response
 
 @app.route('/process', methods=['POST'])
 def process_audio():
@@ -354,30 +1107,162 @@ def process_audio():
     audio_file = request.files['audio']
     logger.info('Processing audio file')
 
+    # ?features=a,b computes only the stages those features need
+    try:
+        requested = parse_features(request.values.get('features'))
+    except ValueError as e:
+        return jsonify({"error": str(e), "available": feature_graph.outputs}), 400
+
+    # With CONTOUR_DIR set, a full analysis that names a recording_id also keeps its
+    # frame-level tracks. The extra Praat pass is opt-in, and the key is never the
+    # client's request ID, which can repeat and would replace another recording
+    recording_id = request.values.get('recording_id') if contour_dir else None
+    if recording_id is not None:
+        if not valid_recording_id(recording_id):
+            return jsonify({"error": f"Invalid recording_id: {recording_id}"}), 400
+        if requested != default_features:
+            logger.info(f'Not storing contours of {recording_id} for a partial feature selection')
+            recording_id = None
+
+    audio_path = None
     try:
-        # Save with fixed filename
-        with open(output_path, 'wb') as output_file:
-            logger.info(f'Output path: {output_path}')
-            logger.info(f'Output file: {output_file}')
-            audio_file.save(output_file) 
-            output_file.flush()
-
-            # Pass explicit path to analysis function
-            analysis_result = analyze_audio_file()
-            logger.info('Analysis completed successfully')
-            logger.info(f'Analysis result: {analysis_result}')
-
-            # Check if the result contains an error
-            if "error" in analysis_result:
-                logger.warning(f'Analysis failed: {analysis_result["error"]}')
-                return jsonify(analysis_result), 400
+        # Save under a unique name so concurrent requests don't overwrite each other
+        audio_path, duration = save_upload(audio_file)
+        logger.info(f'Audio path: {audio_path}, duration: {duration}')
+
+        rejected = check_upload(duration)
+        if rejected:
+            return rejected
+
+        # ?progressive=1 answers within the latency budget from the start of the
+        # recording; the final result follows at /results/<result ID>
+        if request_flag('progressive'):
+            budget = request_seconds(request.values.get('budget'), progressive_budget, max_deadline)
+            preview = preview_seconds(budget, duration)
+            if preview < duration:
+                response = start_progressive(audio_path, duration, preview, budget, requested, recording_id)
+                audio_path = None  # Removed by the refinement thread
+                return response
+
+        # Queue by estimated cost; short recordings run first. The cost model is
+        # calibrated on the default feature set, so only those runs refine it
+        cancel = CancelToken(request_deadline(), request.environ.get('werkzeug.socket'))
+        analysis_result = scheduler.run(duration, cancel, run_analysis, analyze_audio_file, audio_path, cancel, requested, recording_id,
+                                        learn_cost=requested == default_features and not recording_id and not g.profile)
+        logger.info('Analysis completed successfully')
+        logger.info(f'Analysis result: {analysis_result}')
+
+        # Check if the result contains an error
+        if "error" in analysis_result:
+            logger.warning(f'Analysis failed: {analysis_result["error"]}')
+            return jsonify(analysis_result), 400
 
+        # Write the result to the backend so the client doesn't have to post it again
+        if request_flag('deliver'):
+            analysis_result["delivery"] = queue_delivery(analysis_result, request.form)
+            logger.info(f'Delivery: {analysis_result["delivery"]}')
+
+        analysis_result["status"] = "final"
         return jsonify(analysis_result)
 
+    except AdmissionRejected as e:
+        logger.warning(f'Request rejected: {str(e)}')
+        return rejection_response(e)
+
+    except AnalysisCancelled as e:
+        logger.warning(f'Analysis cancelled: {str(e)}')
+        return jsonify({"error": f"Analysis cancelled: {str(e)}"}), 504
+
     except Exception as e:
         logger.error(f'Error processing audio: {str(e)}', exc_info=True)
         return jsonify({"error": f"Processing failed: {str(e)}"}), 500
 
+    finally:
+        remove_upload(audio_path)
+
+@app.route('/results/<result_id>', methods=['GET'])
+def get_result(result_id):
+    # ?wait=N blocks up to N seconds for the final result
+    wait = request_seconds(request.args.get('wait'), 0.0, max_result_wait)
+    entry = result_store.get(result_id, wait)
+    if entry is None:
+        return jsonify({"error": f"No result {result_id}"}), 404
+
+    status, result = entry
+    response = dict(result or {}, status=status, result_id=result_id)
+    return jsonify(response), 200 if status in ResultStore.finished else 202
+
+@app.route('/pitch', methods=['POST'])
+def process_pitch():
+    logger.info('Received pitch processing request')
+
+    if 'audio' not in request.files:
+        logger.warning('No audio file in request')
+        return jsonify({"error": "No audio file uploaded"}), 400
+
+    engine = request.args.get('engine', pitch_engine)
+    if engine not in pitch_engines:
+        return jsonify({"error": f"Unknown pitch engine: {engine}"}), 400
+
+    audio_path = None
+    try:
+        audio_path, duration = save_upload(request.files['audio'])
+        rejected = check_upload(duration)
+        if rejected:
+            return rejected
+
+        # Same admission control and deadline as /process, at the smaller cost of a pitch-only run
+        cancel = CancelToken(request_deadline(), request.environ.get('werkzeug.socket'))
+        analysis_result = scheduler.run(duration * pitch_cost_ratio, cancel, run_analysis, analyze_pitch_file, audio_path, engine,
+                                        learn_cost=False)
+        logger.info(f'Pitch result: {analysis_result}')
+        return jsonify(analysis_result)
+
+    except AdmissionRejected as e:
+        logger.warning(f'Pitch request rejected: {str(e)}')
+        return rejection_response(e)
+
+    except AnalysisCancelled as e:
+        logger.warning(f'Pitch analysis cancelled: {str(e)}')
+        return jsonify({"error": f"Analysis cancelled: {str(e)}"}), 504
+
+    except Exception as e:
+        logger.error(f'Error processing pitch: {str(e)}', exc_info=True)
+        return jsonify({"error": f"Processing failed: {str(e)}"}), 500
+
+    finally:
+        remove_upload(audio_path)
+
+@app.errorhandler(413)
+def upload_too_large(e):
+    return jsonify({"error": f"Upload exceeds the {max_upload_bytes // (1024 * 1024)} MB limit"}), 413
+
+@app.route('/admin/profiles', methods=['GET'])
+def get_profiles():
+    if not admin_authorized():
+        return jsonify({"error": "Forbidden"}), 403
+    return jsonify(list_profiles()), 200
+
+@app.route('/admin/profiles/<profile_id>', methods=['GET'])
+def get_profile(profile_id):
+    if not admin_authorized():
+        return jsonify({"error": "Forbidden"}), 403
+
+    path = profile_path(profile_id)
+    if path is None or not os.path.exists(path):
+        return jsonify({"error": f"No profile {profile_id}"}), 404
+
+    # Raw stats can be opened with pstats or snakeviz
+    if request.args.get('format') == 'raw':
+        return send_file(path, mimetype='application/octet-stream', as_attachment=True,
+                         download_name=f'{profile_id}.prof')
+
+    sort = request.args.get('sort', 'cumulative')
+    if sort not in ('cumulative', 'tottime', 'ncalls', 'name'):
+        return jsonify({"error": f"Unknown sort key: {sort}"}), 400
+    limit = request.args.get('limit', 40, type=int)
+    return format_profile(profile_id, sort, limit), 200, {'Content-Type': 'text/plain; charset=utf-8'}
+
 @app.route('/health', methods=['GET'])
 def health_check():
     logger.info('Health check requested')
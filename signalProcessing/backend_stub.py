@@ -0,0 +1,171 @@
+"""
+Local stand-in for the Node backend's /api/speechData routes.
+
+Accepts the same POST bodies as backend/routes/speechData.js (single and
+batch), applies its validation (required fields, ObjectId user_id), stores a
+document with a repeated delivery_id only once, and keeps the documents in memory,
+so the analysis round trip can be exercised without MongoDB or the Node server.
+
+Usage:
+    python backend_stub.py [--port 8000]
+"""
+import argparse
+import re
+import threading
+import time
+from datetime import datetime
+
+from flask import Flask, request, jsonify
+from werkzeug.serving import make_server
+
+def create_backend_stub(delay=0.0):
+    """
+    Create the stand-in backend app.
+
+    Args:
+        delay: Seconds to sleep before answering each POST, to mimic database latency
+
+    Returns:
+        Flask: App whose received documents are kept in app.config["SPEECH_DATA"]
+    """
+    stub = Flask(__name__)
+    stub.config["SPEECH_DATA"] = []
+    stub.config["REQUESTS"] = 0
+    # Status codes to return, in order, before accepting writes; used to exercise retries
+    stub.config["FAIL_WITH"] = []
+    # Seconds to stall, in order, after storing and before answering; used to exercise timeouts
+    stub.config["STALL"] = []
+    lock = threading.Lock()
+    by_delivery_id = {}
+
+    def validate(body):
+        # Same checks as validateSpeechData in the Node route
+        if not isinstance(body, dict) or not body.get("user_id") or not body.get("metrics") or not body.get("thresholds"):
+            return "User ID, metrics, and thresholds are required."
+        if not re.match(r"^[0-9a-fA-F]{24}$", str(body["user_id"])):
+            return "User ID must be a 24-character hex ObjectId."
+        return None
+
+    def store(documents):
+        saved = []
+        with lock:
+            for body in documents:
+                # Upsert on delivery_id, as the Node route does
+                delivery_id = body.get("delivery_id")
+                if delivery_id and delivery_id in by_delivery_id:
+                    saved.append(by_delivery_id[delivery_id])
+                    continue
+                document = dict(body)
+                document.setdefault("date_recorded", datetime.now().isoformat())
+                stub.config["SPEECH_DATA"].append(document)
+                document["_id"] = str(len(stub.config["SPEECH_DATA"]))
+                if delivery_id:
+                    by_delivery_id[delivery_id] = document
+                saved.append(document)
+        return saved
+
+    def stall():
+        with lock:
+            seconds = stub.config["STALL"].pop(0) if stub.config["STALL"] else 0
+        if seconds:
+            time.sleep(seconds)
+
+    def injected_failure():
+        with lock:
+            stub.config["REQUESTS"] += 1
+            if stub.config["FAIL_WITH"]:
+                return stub.config["FAIL_WITH"].pop(0)
+        return None
+
+    @stub.route('/api/speechData', methods=['POST'])
+    def add_speech_data():
+        status = injected_failure()
+        if status:
+            return jsonify({"error": "Injected failure"}), status
+
+        body = request.get_json(silent=True)
+        error = validate(body)
+        if error:
+            return jsonify({"error": error}), 400
+
+        if delay:
+            time.sleep(delay)
+
+        document, = store([body])
+        stall()
+        return jsonify({"message": "Speech metrics added successfully.", "data": document}), 201
+
+    @stub.route('/api/speechData/batch', methods=['POST'])
+    def add_speech_data_batch():
+        status = injected_failure()
+        if status:
+            return jsonify({"error": "Injected failure"}), status
+
+        body = request.get_json(silent=True) or {}
+        documents = body.get("documents")
+        if not isinstance(documents, list) or not documents:
+            return jsonify({"error": "A non-empty documents array is required."}), 400
+        for index, document in enumerate(documents):
+            error = validate(document)
+            if error:
+                return jsonify({"error": error, "index": index}), 400
+
+        if delay:
+            time.sleep(delay)
+
+        saved = store(documents)
+        stall()
+        return jsonify({"message": "Speech metrics added successfully.", "data": saved}), 201
+
+    @stub.route('/api/speechData', methods=['GET'])
+    def list_speech_data():
+        with lock:
+            return jsonify(list(stub.config["SPEECH_DATA"])), 200
+
+    return stub
+
+class BackendStubServer:
+    """Runs the stand-in backend on a background thread"""
+
+    def __init__(self, host="127.0.0.1", port=0, delay=0.0):
+        self.app = create_backend_stub(delay)
+        self.server = make_server(host, port, self.app, threaded=True)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        return f"http://{self.server.host}:{self.server.port}"
+
+    @property
+    def documents(self):
+        return self.app.config["SPEECH_DATA"]
+
+    def fail_next(self, *statuses):
+        """Answer the next requests with these status codes"""
+        self.app.config["FAIL_WITH"].extend(statuses)
+
+    def stall_next(self, *seconds):
+        """Store the next requests' documents, then wait this long before answering"""
+        self.app.config["STALL"].extend(seconds)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in for /api/speechData")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--delay", type=float, default=0.0, help="Seconds of simulated database latency per POST")
+    args = parser.parse_args()
+
+    create_backend_stub(args.delay).run(host="0.0.0.0", port=args.port)
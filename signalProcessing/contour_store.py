@@ -0,0 +1,132 @@
+import json
+import os
+import re
+import shutil
+import time
+import uuid
+
+import numpy as np
+
+# Frame-level tracks are persisted only when CONTOUR_DIR is set
+contour_dir = os.environ.get("CONTOUR_DIR")
+track_dtype = np.float32
+# Bumped when the layout or the meaning of a track changes
+format_version = 1
+
+_recording_id_pattern = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+def valid_recording_id(recording_id):
+    return bool(recording_id) and _recording_id_pattern.match(recording_id) is not None
+
+def recording_path(recording_id, root=None):
+    """
+    Return the directory holding a recording's tracks, or None if the ID is invalid.
+
+    Args:
+        recording_id: Recording ID
+        root: Store directory, defaults to CONTOUR_DIR
+
+    Returns:
+        str: Directory path
+    """
+    root = root or contour_dir
+    if root is None or not valid_recording_id(recording_id):
+        return None
+    return os.path.join(root, recording_id)
+
+def save_contours(recording_id, tracks, meta, root=None):
+    """
+    Persist the frame-level tracks of a recording.
+
+    Each track is written as its own .npy file (one column per file), so a
+    reader can memory-map just the tracks a metric needs. The directory is
+    written under a temporary name and renamed into place, so readers never
+    see a partial recording and a re-analysis replaces the old one.
+
+    Args:
+        recording_id: Key the tracks are stored under
+        tracks: Track name to 1-D or 2-D array
+        meta: JSON-serialisable description: recording-level fields, and under
+            "tracks" the time axis of each track
+        root: Store directory, defaults to CONTOUR_DIR
+
+    Returns:
+        str: Directory the recording was written to
+    """
+    path = recording_path(recording_id, root)
+    if path is None:
+        raise ValueError(f"Invalid recording ID or no store directory: {recording_id}")
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    staging = f"{path}.tmp-{uuid.uuid4().hex}"
+    os.makedirs(staging)
+    try:
+        for name, values in tracks.items():
+            np.save(os.path.join(staging, f"{name}.npy"), np.ascontiguousarray(values, dtype=track_dtype))
+
+        meta = dict(meta, recording_id=recording_id, version=format_version, created=time.time())
+        with open(os.path.join(staging, "meta.json"), "w") as f:
+            json.dump(meta, f)
+
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        os.replace(staging, path)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return path
+
+def load_contours(recording_id, names=None, root=None):
+    """
+    Open a recording's tracks as read-only memory maps.
+
+    Args:
+        recording_id: Recording ID
+        names: Tracks to open, all if None
+        root: Store directory, defaults to CONTOUR_DIR
+
+    Returns:
+        tuple: (track name to array, meta), or None if the recording is not stored
+    """
+    path = recording_path(recording_id, root)
+    if path is None or not os.path.isdir(path):
+        return None
+
+    with open(os.path.join(path, "meta.json")) as f:
+        meta = json.load(f)
+
+    names = meta["tracks"].keys() if names is None else names
+    tracks = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in names}
+    return tracks, meta
+
+def list_recordings(root=None):
+    """
+    List stored recording IDs.
+
+    Args:
+        root: Store directory, defaults to CONTOUR_DIR
+
+    Returns:
+        list: Recording IDs, sorted
+    """
+    root = root or contour_dir
+    if root is None or not os.path.isdir(root):
+        return []
+    return sorted(entry.name for entry in os.scandir(root)
+                  if entry.is_dir() and valid_recording_id(entry.name)
+                  and os.path.exists(os.path.join(entry.path, "meta.json")))
+
+def track_times(meta, name, length):
+    """
+    Frame times of a regularly sampled track.
+
+    Args:
+        meta: Recording meta from load_contours
+        name: Track name
+        length: Number of frames
+
+    Returns:
+        ndarray: Time in seconds of each frame
+    """
+    axis = meta["tracks"][name]
+    return axis["start"] + axis["step"] * np.arange(length)
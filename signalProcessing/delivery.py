@@ -0,0 +1,307 @@
+import http.client
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+import uuid
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+# Direct delivery to the backend's /api/speechData; disabled unless BACKEND_URL is set
+backend_url = os.environ.get("BACKEND_URL")
+delivery_batch_size = int(os.environ.get("DELIVERY_BATCH_SIZE", 20))
+delivery_batch_window = float(os.environ.get("DELIVERY_BATCH_WINDOW", 0.0))  # Seconds to wait for more results
+delivery_max_retries = int(os.environ.get("DELIVERY_MAX_RETRIES", 5))
+delivery_backoff = float(os.environ.get("DELIVERY_BACKOFF", 0.5))            # Base delay, doubled per attempt
+delivery_pool_size = int(os.environ.get("DELIVERY_POOL_SIZE", 2))
+delivery_timeout = float(os.environ.get("DELIVERY_TIMEOUT", 10.0))           # Seconds per backend request
+delivery_max_pending = int(os.environ.get("DELIVERY_MAX_PENDING", 1000))     # Queued documents before new ones are dropped
+
+threshold_fields = [
+    "volume_min", "volume_max", "pitch_min", "pitch_max", "speed_min", "speed_max",
+    "volume_fluctuation_max", "pitch_fluctuation_min", "pitch_fluctuation_max", "speed_fluctuation_max"
+]
+
+_object_id_pattern = re.compile(r"^[0-9a-fA-F]{24}$")
+
+def valid_object_id(value):
+    """SpeechData.user_id is a MongoDB ObjectId; other values fail on the backend"""
+    return isinstance(value, str) and _object_id_pattern.match(value) is not None
+
+def get_audio_notes(metrics, thresholds):
+    """
+    Label metrics against thresholds, as getAudioNotes in backend/index.js does.
+
+    Args:
+        metrics: SpeechData metrics
+        thresholds: User thresholds
+
+    Returns:
+        list: Audio notes accepted by the SpeechData schema
+    """
+    notes = []
+
+    if metrics["volume"] > thresholds["volume_max"]:
+        notes.append("loud")
+    elif metrics["volume"] < thresholds["volume_min"]:
+        notes.append("quiet")
+    else:
+        notes.append("normal-volume")
+
+    if metrics["pitch"] > thresholds["pitch_max"]:
+        notes.append("high-pitch")
+    elif metrics["pitch"] < thresholds["pitch_min"]:
+        notes.append("low-pitch")
+    else:
+        notes.append("normal-pitch")
+
+    if metrics["speed"] > thresholds["speed_max"]:
+        notes.append("fast")
+    elif metrics["speed"] < thresholds["speed_min"]:
+        notes.append("slow")
+    else:
+        notes.append("normal-speed")
+
+    if metrics["volume_fluctuation"] > thresholds["volume_fluctuation_max"]:
+        notes.append("unstable-volume")
+    else:
+        notes.append("stable-volume")
+
+    if metrics["pitch_fluctuation"] > thresholds["pitch_fluctuation_max"]:
+        notes.append("unstable-pitch")
+    elif metrics["pitch"] < thresholds["pitch_min"]:
+        notes.append("monotone")
+    else:
+        notes.append("stable-pitch")
+
+    if metrics["speed_fluctuation"] > thresholds["speed_fluctuation_max"]:
+        notes.append("unstable-speed")
+    else:
+        notes.append("stable-speed")
+
+    return notes
+
+def to_speech_data(result, user_id, thresholds, recording_url=None):
+    """
+    Map a /process result to a SpeechData document, with the same metric
+    mapping as backend/index.js.
+
+    Args:
+        result: Analysis result from analyze_audio_file
+        user_id: Patient the recording belongs to
+        thresholds: The patient's thresholds
+        recording_url: Optional link to the stored recording
+
+    Returns:
+        dict: Body for POST /api/speechData, with a delivery_id the backend
+            deduplicates on, so retrying a delivery never stores it twice
+    """
+    metrics = {
+        "volume": float(result["relative_volume"]),
+        "pitch": float(result["f0_mean"]),
+        "speed": float(result["rate_of_speech"]),
+        "volume_fluctuation": float(result["volume_fluctuation"]),
+        "pitch_fluctuation": float(result["f0_std"]),
+        "speed_fluctuation": float(result["speech_rate_fluctuation"]),
+        "ambient_noise": result["ambient_noise"],
+    }
+    thresholds = {name: float(thresholds[name]) for name in threshold_fields}
+    return {
+        "user_id": user_id,
+        "date_recorded": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "metrics": metrics,
+        "thresholds": thresholds,
+        "audio_notes": get_audio_notes(metrics, thresholds),
+        "recording_url": recording_url,
+        "delivery_id": uuid.uuid4().hex,
+    }
+
+class ConnectionPool:
+    """Keep-alive HTTP connections to one host, reused across requests"""
+
+    def __init__(self, base_url, size, timeout=10.0):
+        parts = urlsplit(base_url)
+        self.connection_class = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+        self.host = parts.hostname
+        self.port = parts.port
+        self.prefix = parts.path.rstrip("/")
+        self.timeout = timeout
+        self.idle = queue.LifoQueue(maxsize=size)
+
+    def _connect(self):
+        return self.connection_class(self.host, self.port, timeout=self.timeout)
+
+    def request(self, method, path, body):
+        """
+        Send a JSON request on a pooled connection.
+
+        Returns:
+            tuple: (status, response body)
+        """
+        try:
+            connection = self.idle.get_nowait()
+            reused = True
+        except queue.Empty:
+            connection = self._connect()
+            reused = False
+
+        payload = json.dumps(body).encode()
+        headers = {"Content-Type": "application/json", "Connection": "keep-alive"}
+        try:
+            connection.request(method, self.prefix + path, body=payload, headers=headers)
+            response = connection.getresponse()
+            data = response.read()
+        except (http.client.HTTPException, OSError):
+            connection.close()
+            if not reused:
+                raise
+            # The server may have closed an idle keep-alive connection; retry once on a fresh one
+            connection = self._connect()
+            try:
+                connection.request(method, self.prefix + path, body=payload, headers=headers)
+                response = connection.getresponse()
+                data = response.read()
+            except (http.client.HTTPException, OSError):
+                connection.close()
+                raise
+
+        if response.will_close:
+            connection.close()
+        else:
+            try:
+                self.idle.put_nowait(connection)
+            except queue.Full:
+                connection.close()
+        return response.status, data
+
+    def close(self):
+        while True:
+            try:
+                self.idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+class ResultDelivery:
+    """
+    Background delivery of SpeechData documents to the backend.
+
+    Documents queue up and worker threads send them over pooled connections.
+    Whatever has accumulated when a worker becomes free (up to batch_size) is
+    sent as one /api/speechData/batch write, so batches grow only under load.
+    Connection errors and 5xx responses are retried with exponential backoff;
+    a batch that still fails is dropped whole, since resending its documents
+    one by one would only multiply the load on a struggling backend. A batch
+    rejected with a 4xx is resent one document at a time, so only the
+    documents that are invalid on their own are dropped. At most max_pending
+    documents wait; further submissions are dropped and counted.
+    """
+
+    def __init__(self, base_url, batch_size=delivery_batch_size, batch_window=delivery_batch_window,
+                 max_retries=delivery_max_retries, backoff=delivery_backoff, workers=delivery_pool_size,
+                 timeout=delivery_timeout, max_pending=delivery_max_pending):
+        self.pool = ConnectionPool(base_url, workers, timeout)
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.pending = queue.Queue(maxsize=max_pending)
+        self.lock = threading.Lock()
+        self.counts = {"queued": 0, "delivered": 0, "failed": 0, "dropped": 0, "retries": 0, "batches": 0, "split_batches": 0}
+        self.threads = [threading.Thread(target=self._run, daemon=True) for _ in range(workers)]
+        for thread in self.threads:
+            thread.start()
+
+    def submit(self, document):
+        """
+        Queue a document for delivery.
+
+        Returns:
+            bool: False if the queue is full and the document was dropped
+        """
+        try:
+            self.pending.put_nowait(document)
+        except queue.Full:
+            logger.error(f'Delivery queue full ({self.pending.maxsize}), dropping a speech data document')
+            self._count("dropped")
+            return False
+        self._count("queued")
+        return True
+
+    def flush(self):
+        """Block until every submitted document has been delivered or dropped"""
+        self.pending.join()
+
+    def stats(self):
+        with self.lock:
+            return dict(self.counts, pending=self.pending.qsize())
+
+    def _count(self, key, amount=1):
+        with self.lock:
+            self.counts[key] += amount
+
+    def _next_batch(self):
+        batch = [self.pending.get()]
+        deadline = time.monotonic() + self.batch_window
+        while len(batch) < self.batch_size:
+            try:
+                remaining = deadline - time.monotonic()
+                batch.append(self.pending.get(timeout=remaining) if remaining > 0 else self.pending.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _send(self, batch):
+        if len(batch) == 1:
+            return self.pool.request("POST", "/api/speechData", batch[0])
+        return self.pool.request("POST", "/api/speechData/batch", {"documents": batch})
+
+    def _deliver(self, batch):
+        rejected = False
+        for attempt in range(self.max_retries + 1):
+            try:
+                status, data = self._send(batch)
+                if status < 300:
+                    self._count("delivered", len(batch))
+                    self._count("batches")
+                    return
+                if status < 500:
+                    # Validation errors will not succeed on retry
+                    logger.error(f'Backend rejected {len(batch)} speech data documents ({status}): {data[:200]}')
+                    rejected = True
+                    break
+                logger.warning(f'Backend returned {status} for {len(batch)} documents')
+            except (http.client.HTTPException, OSError) as e:
+                logger.warning(f'Delivery to backend failed: {str(e)}')
+
+            if attempt < self.max_retries:
+                self._count("retries")
+                time.sleep(self.backoff * 2 ** attempt * random.uniform(0.5, 1.5))
+
+        if rejected and len(batch) > 1:
+            # One bad document fails the whole write; resend individually so the
+            # others still land (delivery_id keeps any already written from duplicating)
+            logger.warning(f'Resending a rejected batch of {len(batch)} documents individually')
+            self._count("split_batches")
+            for document in batch:
+                self._deliver([document])
+            return
+
+        logger.error(f'Dropping {len(batch)} speech data documents after {"rejection" if rejected else "retries"}')
+        self._count("failed", len(batch))
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            try:
+                self._deliver(batch)
+            except Exception as e:
+                logger.error(f'Unexpected delivery error: {str(e)}', exc_info=True)
+                self._count("failed", len(batch))
+            finally:
+                for _ in batch:
+                    self.pending.task_done()
@@ -0,0 +1,123 @@
+"""
+float32 vs float64 check for the signal pipeline.
+
+Runs decode and the librosa volume features (whole file and 5 s chunks) in
+both sample types, reports peak traced memory and wall time, and fails if the
+float32 metrics drift from float64 by more than MAX_DRIFT_DB.
+
+Usage:
+    python dtype_benchmark.py [audio files...] [--repeat N]
+
+Defaults to every .wav under ./audio plus generated 120 s mono and stereo recordings.
+"""
+import argparse
+import glob
+import logging
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import soundfile as sf
+
+import app
+from load_test import generate_recording
+
+# Largest accepted float32 vs float64 difference in any dB metric
+MAX_DRIFT_DB = 0.01
+
+def run_pipeline(audio_path, dtype, chunk_duration=5.0):
+    """Decode and compute relative volume, noise level and per-chunk volumes"""
+    # The decoded signal goes in as is, multichannel included, as /process passes it
+    y, sr = sf.read(audio_path, dtype=dtype)
+    relative_volume, noise_db = app.calculate_relative_volume(y, sr)
+
+    chunk_volumes = app.calculate_chunk_volumes(y, sr, chunk_duration)
+    if len(app.stack_chunks(app.to_mono(y), sr, chunk_duration)[1]) != len(chunk_volumes):
+        raise RuntimeError(f"Chunk volumes failed for {audio_path}")
+    return {
+        "relative_volume": float(relative_volume),
+        "noise_db": float(noise_db),
+        "volume_fluctuation": float(np.std(chunk_volumes)) if len(chunk_volumes) else 0.0,
+    }
+
+def generate_stereo(mono_path, stereo_path):
+    """Write a stereo copy of a mono recording with differing channels, so a missing downmix cannot go unnoticed"""
+    y, sr = sf.read(mono_path)
+    sf.write(stereo_path, np.stack([y, 0.5 * y], axis=1), sr)
+
+def drift(audio_path):
+    """
+    Largest float32 vs float64 difference over the pipeline's metrics.
+
+    Args:
+        audio_path: Path to the audio file
+
+    Returns:
+        float: Drift in dB
+    """
+    reference, value = run_pipeline(audio_path, "float64"), run_pipeline(audio_path, "float32")
+    return max(abs(value[name] - reference[name]) if np.isfinite(reference[name]) else 0.0 for name in reference)
+
+def measure(audio_path, dtype, repeat):
+    """Return (metrics, best wall time, peak traced bytes)"""
+    best = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        metrics = run_pipeline(audio_path, dtype)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    run_pipeline(audio_path, dtype)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return metrics, best, peak
+
+def report(audio_paths, repeat):
+    worst_drift = 0.0
+    totals = {"float64": [0.0, 0], "float32": [0.0, 0]}
+
+    for audio_path in audio_paths:
+        results = {dtype: measure(audio_path, dtype, repeat) for dtype in totals}
+        print(f"\n{os.path.basename(audio_path)} ({sf.info(audio_path).duration:.1f} s)")
+        for dtype, (_, elapsed, peak) in results.items():
+            totals[dtype][0] += elapsed
+            totals[dtype][1] = max(totals[dtype][1], peak)
+            print(f"  {dtype}  {elapsed * 1000:8.1f} ms  peak {peak / 2**20:7.1f} MiB")
+
+        for name, reference in results["float64"][0].items():
+            value = results["float32"][0][name]
+            drift = abs(value - reference) if np.isfinite(reference) else 0.0
+            worst_drift = max(worst_drift, drift)
+            print(f"  {name:<19} float64 {reference:10.4f}  float32 {value:10.4f}  drift {drift:.2e} dB")
+
+    print("\nSummary")
+    time64, peak64 = totals["float64"]
+    time32, peak32 = totals["float32"]
+    print(f"  time: float64 {time64:.3f} s, float32 {time32:.3f} s ({time64 / time32:.2f}x)")
+    print(f"  peak memory: float64 {peak64 / 2**20:.1f} MiB, float32 {peak32 / 2**20:.1f} MiB ({peak64 / peak32:.2f}x)")
+    print(f"  worst drift: {worst_drift:.2e} dB (limit {MAX_DRIFT_DB} dB)")
+    return worst_drift <= MAX_DRIFT_DB
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("audio", nargs="*", help="Audio files to analyze")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per sample type; the best is kept")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    with tempfile.TemporaryDirectory() as workdir:
+        audio_paths = args.audio
+        if not audio_paths:
+            generated = os.path.join(workdir, "generated_120s.wav")
+            generate_recording(generated, 120)
+            stereo = os.path.join(workdir, "generated_120s_stereo.wav")
+            generate_stereo(generated, stereo)
+            audio_paths = sorted(glob.glob(os.path.join(app.root_folder, "audio", "*.wav"))) + [generated, stereo]
+        passed = report(audio_paths, args.repeat)
+
+    if not passed:
+        print("FAIL: float32 drift exceeds the limit")
+        sys.exit(1)
@@ -0,0 +1,192 @@
+from math import gcd
+
+import numpy as np
+import soundfile as sf
+from scipy.signal import resample_poly
+
+# Pitch parameters passed to the Praat script by app.py
+MIN_PITCH = 80
+MAX_PITCH = 400
+TIME_STEP = 0.01
+
+# YIN tuning
+ANALYSIS_RATE = 16000      # Signals above this rate are resampled first; 400 Hz needs far less
+YIN_THRESHOLD = 0.10       # Aperiodicity threshold on the normalised difference function
+SILENCE_THRESHOLD = 0.03   # Frames whose peak is below this fraction of the global peak are unvoiced
+FRAMES_PER_BLOCK = 2048    # Bounds the size of the FFT work arrays for long recordings
+
+# Accuracy against Praat (pitch_benchmark.py on the repo's recordings): mean,
+# median and quartiles agree within 1.5%, but f0_std reads about 13% low and
+# f0_min/f0_max can be 20-30% off on recordings with octave jumps or creak.
+# f0_std is what the backend stores as pitch_fluctuation, and /pitch derives
+# its own pitch_fluctuation from min/max, so neither should come from this
+# engine where Praat is affordable.
+#
+# Speed: the engine's alternative is the pitch-only Praat run behind /pitch
+# (calculate_praat_pitch), not the full script /process runs. Against that it
+# is only about 2x faster (1.8-1.9x in pitch_benchmark.py); the 8x figure is
+# against the full script and does not apply here. Use it only where a 2x
+# cut in pitch time is worth the error above.
+
+# Feature names produced by this engine, in the same order as the Praat output
+pitch_features = [
+    "f0_mean", "f0_std", "f0_median", "f0_min", "f0_max", "f0_quantile25", "f0_quan75"
+]
+
+def frame_signal(y, frame_length, hop_length):
+    """
+    Build a 2-D frame matrix over a signal without copying it.
+
+    Args:
+        y: Mono audio signal
+        frame_length: Number of samples per frame
+        hop_length: Number of samples between frame starts
+
+    Returns:
+        ndarray: Read-only strided view of shape (n_frames, frame_length)
+    """
+    if len(y) < frame_length:
+        y = np.pad(y, (0, frame_length - len(y)))
+    return np.lib.stride_tricks.sliding_window_view(y, frame_length)[::hop_length]
+
+def _yin_block(frames, tau_min, tau_max, threshold):
+    """
+    Estimate the period of every frame in a block with a vectorized YIN.
+
+    Args:
+        frames: 2-D array of shape (n_frames, 2 * tau_max)
+        tau_min: Smallest lag considered (samples)
+        tau_max: Largest lag considered (samples)
+        threshold: Aperiodicity threshold
+
+    Returns:
+        ndarray: Fractional period in samples per frame, NaN where unvoiced
+    """
+    n_frames, frame_length = frames.shape
+    window = frame_length - tau_max
+    n_fft = 1 << int(np.ceil(np.log2(frame_length + window)))
+
+    # Cross-correlation of the first window with every lag, all frames at once
+    spectrum = np.fft.rfft(frames, n_fft, axis=1)
+    head = np.fft.rfft(frames[:, :window], n_fft, axis=1)
+    r = np.fft.irfft(np.conj(head) * spectrum, n_fft, axis=1)[:, :tau_max + 1]
+
+    # Energy of the lagged windows from a running sum of squares
+    energy = np.cumsum(np.square(frames), axis=1)
+    energy = np.concatenate([np.zeros((n_frames, 1)), energy], axis=1)
+    lags = np.arange(tau_max + 1)
+    e_lag = energy[:, lags + window] - energy[:, lags]
+    diff = e_lag[:, :1] + e_lag - 2 * r
+    diff[:, 0] = 0.0
+    np.maximum(diff, 0.0, out=diff)
+
+    # Cumulative mean normalised difference
+    cumulative = np.cumsum(diff[:, 1:], axis=1)
+    cmnd = np.ones_like(diff)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cmnd[:, 1:] = diff[:, 1:] * lags[1:] / cumulative
+    cmnd[~np.isfinite(cmnd)] = 1.0
+
+    # First local minimum below the threshold within the search range
+    inner = cmnd[:, tau_min:tau_max]
+    is_dip = (
+        (inner < threshold) &
+        (inner <= cmnd[:, tau_min + 1:tau_max + 1]) &
+        (inner < cmnd[:, tau_min - 1:tau_max - 1])
+    )
+    voiced = is_dip.any(axis=1)
+    tau = np.argmax(is_dip, axis=1) + tau_min
+
+    # Parabolic interpolation around the chosen lag
+    rows = np.arange(n_frames)
+    left = cmnd[rows, tau - 1]
+    centre = cmnd[rows, tau]
+    right = cmnd[rows, tau + 1]
+    denom = left - 2 * centre + right
+    with np.errstate(divide="ignore", invalid="ignore"):
+        shift = np.where(np.abs(denom) > 1e-12, 0.5 * (left - right) / denom, 0.0)
+    period = tau + np.clip(shift, -1.0, 1.0)
+
+    return np.where(voiced, period, np.nan)
+
+def estimate_pitch_track(y, sr, min_pitch=MIN_PITCH, max_pitch=MAX_PITCH, time_step=TIME_STEP):
+    """
+    Compute a frame-wise f0 track over a signal.
+
+    Args:
+        y: Audio signal (mono, or multichannel with channels on the last axis)
+        sr: Sample rate
+        min_pitch: Pitch floor in Hz
+        max_pitch: Pitch ceiling in Hz
+        time_step: Time between frame centres in seconds
+
+    Returns:
+        ndarray: f0 in Hz per frame, NaN for unvoiced frames
+    """
+    y = np.asarray(y)
+    if y.ndim > 1:
+        y = y.mean(axis=1)
+    if sr > ANALYSIS_RATE:
+        factor = gcd(int(sr), ANALYSIS_RATE)
+        y = resample_poly(y, ANALYSIS_RATE // factor, int(sr) // factor)
+        sr = ANALYSIS_RATE
+
+    tau_min = max(2, int(np.floor(sr / max_pitch)))
+    tau_max = int(np.ceil(sr / min_pitch))
+    frame_length = 2 * tau_max
+    hop_length = max(1, int(round(time_step * sr)))
+
+    frames = frame_signal(y, frame_length, hop_length)
+    peak = np.max(np.abs(y)) if len(y) else 0.0
+    if peak == 0:
+        return np.full(len(frames), np.nan)
+
+    f0 = np.empty(len(frames))
+    for start in range(0, len(frames), FRAMES_PER_BLOCK):
+        block = frames[start:start + FRAMES_PER_BLOCK]
+        period = _yin_block(block, tau_min, tau_max, YIN_THRESHOLD)
+        silent = np.max(np.abs(block), axis=1) < SILENCE_THRESHOLD * peak
+        period[silent] = np.nan
+        f0[start:start + len(block)] = sr / period
+
+    f0[(f0 < min_pitch) | (f0 > max_pitch)] = np.nan
+    return f0
+
+def summarize_pitch(f0):
+    """
+    Reduce an f0 track to the statistics reported by the Praat script.
+
+    Args:
+        f0: f0 track in Hz, NaN for unvoiced frames
+
+    Returns:
+        dict: Pitch statistics keyed by feature name (0.0 when nothing is voiced)
+    """
+    voiced = f0[np.isfinite(f0)]
+    if len(voiced) == 0:
+        return {name: 0.0 for name in pitch_features}
+
+    q25, median, q75 = np.quantile(voiced, [0.25, 0.5, 0.75])
+    values = [
+        np.mean(voiced),
+        np.std(voiced, ddof=1) if len(voiced) > 1 else 0.0,
+        median,
+        np.min(voiced),
+        np.max(voiced),
+        q25,
+        q75,
+    ]
+    return {name: round(float(value), 2) for name, value in zip(pitch_features, values)}
+
+def analyze_pitch(audio_path):
+    """
+    Compute the f0 statistics for an audio file with the fast engine.
+
+    Args:
+        audio_path: Path to the audio file
+
+    Returns:
+        dict: Pitch statistics keyed by feature name
+    """
+    y, sr = sf.read(audio_path)
+    return summarize_pitch(estimate_pitch_track(y, sr))
@@ -0,0 +1,86 @@
+class FeatureGraph:
+    """
+    Dependency graph of analysis stages and the features derived from them.
+
+    Each node is a function of the evaluation context and the values of its
+    dependencies. Evaluating a set of features runs only the nodes they
+    transitively need, each at most once, so features that share an
+    intermediate result (a Praat run, the decoded signal) share its cost.
+    """
+
+    def __init__(self):
+        self.nodes = {}
+        self.outputs = []
+
+    def node(self, name, *dependencies, output=False):
+        """
+        Register a node.
+
+        Args:
+            name: Node name; output nodes are the feature names clients can request
+            dependencies: Names of the nodes whose values are passed to the function
+            output: Whether the node is a selectable feature
+
+        Returns:
+            Decorator registering func(context, *dependency_values)
+        """
+        def register(func):
+            missing = [dep for dep in dependencies if dep not in self.nodes]
+            if missing:
+                raise ValueError(f"Node {name} depends on unknown nodes: {missing}")
+            self.nodes[name] = (func, dependencies)
+            if output:
+                self.outputs.append(name)
+            return func
+        return register
+
+    def requirements(self, names):
+        """
+        Return every node needed to compute the given features, dependencies first.
+
+        Args:
+            names: Feature names
+
+        Returns:
+            list: Node names in evaluation order
+        """
+        order = []
+        seen = set()
+
+        def visit(name):
+            if name in seen:
+                return
+            seen.add(name)
+            for dep in self.nodes[name][1]:
+                visit(dep)
+            order.append(name)
+
+        for name in names:
+            visit(name)
+        return order
+
+    def evaluate(self, names, context):
+        """
+        Compute the requested features lazily.
+
+        Args:
+            names: Feature (or other node) names, computed in this order
+            context: Passed to every node; if it has a `cancel` token it is
+                checked before each node runs
+
+        Returns:
+            dict: Name to value
+        """
+        unknown = [name for name in names if name not in self.nodes]
+        if unknown:
+            raise KeyError(f"Unknown nodes: {', '.join(unknown)}")
+
+        values = {}
+        cancel = getattr(context, "cancel", None)
+        for name in self.requirements(names):
+            if cancel is not None:
+                cancel.check()
+            func, dependencies = self.nodes[name]
+            values[name] = func(context, *(values[dep] for dep in dependencies))
+
+        return {name: values[name] for name in names}
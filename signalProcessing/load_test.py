@@ -0,0 +1,311 @@
+"""
+Load-test harness for the /process service.
+
+Starts app.py locally (or targets a running instance), fires concurrent
+/process uploads from a corpus of real or generated recordings, forwards each
+result to a local stand-in for the backend's /api/speechData, and reports
+latency percentiles, throughput, error rates and per-worker CPU and memory.
+
+With --deliver the service writes results to the stand-in itself (direct
+delivery) instead of the client forwarding them.
+
+Usage:
+    python load_test.py --requests 40 --concurrency 4
+    python load_test.py --corpus audio/ --concurrency 8 --deliver
+    python load_test.py --url http://localhost:8001 --no-backend
+"""
+import argparse
+import glob
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import psutil
+import soundfile as sf
+
+from backend_stub import BackendStubServer
+from delivery import to_speech_data
+
+root_folder = os.path.dirname(os.path.abspath(__file__))
+
+# Placeholder user (a valid ObjectId, as SpeechData requires) and thresholds
+# sent with each stand-in speechData document
+load_test_user_id = "000000000000000000000000"
+default_thresholds = {
+    "volume_min": 0, "volume_max": 30,
+    "pitch_min": 85, "pitch_max": 255,
+    "speed_min": 2, "speed_max": 6,
+    "volume_fluctuation_max": 10,
+    "pitch_fluctuation_min": 10, "pitch_fluctuation_max": 80,
+    "speed_fluctuation_max": 3,
+}
+
+def generate_recording(path, duration, sr=44100, seed=0):
+    """
+    Write a synthetic speech-like recording: voiced syllables with a gliding
+    f0 and harmonics, separated by pauses, over a low noise floor.
+
+    Args:
+        path: Output wav path
+        duration: Length in seconds
+        sr: Sample rate
+        seed: Random seed
+    """
+    rng = np.random.default_rng(seed)
+    n = int(duration * sr)
+    y = 0.002 * rng.standard_normal(n)
+    base_f0 = rng.uniform(100, 220)
+
+    t = 0.3
+    while t < duration - 0.5:
+        # Phrases of a few syllables at roughly 4 syllables per second
+        for _ in range(rng.integers(3, 9)):
+            length = rng.uniform(0.12, 0.25)
+            start, stop = int(t * sr), min(int((t + length) * sr), n)
+            if stop <= start:
+                break
+            tt = np.arange(stop - start) / sr
+            f0 = base_f0 * (1 + 0.1 * np.sin(2 * np.pi * rng.uniform(1, 3) * tt))
+            phase = 2 * np.pi * np.cumsum(f0) / sr
+            voiced = sum(np.sin(k * phase) / k for k in range(1, 8))
+            envelope = np.sin(np.pi * tt / length) ** 2
+            y[start:stop] += 0.2 * envelope * voiced
+            t += length + rng.uniform(0.03, 0.1)
+        t += rng.uniform(0.3, 0.8)
+
+    sf.write(path, y / max(1.0, np.max(np.abs(y))), sr)
+
+def build_corpus(corpus_dir, generate, durations, workdir):
+    """Return the list of recordings to upload"""
+    if corpus_dir:
+        paths = sorted(glob.glob(os.path.join(corpus_dir, "*.wav")))
+        if not paths:
+            sys.exit(f"No .wav files in {corpus_dir}")
+        return paths
+
+    paths = []
+    for i in range(generate):
+        duration = durations[i % len(durations)]
+        path = os.path.join(workdir, f"generated_{i}_{duration:g}s.wav")
+        generate_recording(path, duration, seed=i)
+        paths.append(path)
+    return paths
+
+def encode_multipart(field, filename, data, fields=None):
+    """Encode a file field and optional text fields as multipart/form-data"""
+    boundary = uuid.uuid4().hex
+    text = "".join(
+        f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'
+        for name, value in (fields or {}).items()
+    )
+    body = (
+        text +
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+        "Content-Type: audio/wav\r\n\r\n"
+    ).encode() + data + f"\r\n--{boundary}--\r\n".encode()
+    return body, f"multipart/form-data; boundary={boundary}"
+
+def post(url, body, content_type, timeout):
+    """POST a body and return (status, parsed JSON or None)"""
+    req = urllib.request.Request(url, data=body, headers={"Content-Type": content_type}, method="POST")
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            return resp.status, json.loads(resp.read() or b"null")
+    except urllib.error.HTTPError as e:
+        return e.code, None
+
+def run_request(service_url, backend_url, path, timeout, deliver=False):
+    """Upload one recording and forward its result; returns a timing record"""
+    fields = None
+    if deliver:
+        # The service writes the result itself
+        fields = {"deliver": "1", "user_id": load_test_user_id, "thresholds": json.dumps(default_thresholds)}
+        backend_url = None
+    with open(path, "rb") as f:
+        body, content_type = encode_multipart("audio", os.path.basename(path), f.read(), fields)
+
+    record = {"file": os.path.basename(path), "status": None, "backend_status": None}
+    start = time.perf_counter()
+    try:
+        record["status"], result = post(service_url + "/process", body, content_type, timeout)
+        record["process_latency"] = time.perf_counter() - start
+        if backend_url and record["status"] == 200:
+            payload = json.dumps(to_speech_data(result, load_test_user_id, default_thresholds)).encode()
+            record["backend_status"], _ = post(backend_url + "/api/speechData", payload, "application/json", timeout)
+    except Exception as e:
+        record["status"] = type(e).__name__
+        record["process_latency"] = time.perf_counter() - start
+    record["round_trip_latency"] = time.perf_counter() - start
+    return record
+
+class ResourceSampler:
+    """Samples CPU and resident memory of a process and its children"""
+
+    def __init__(self, pid, interval=0.5):
+        self.root = psutil.Process(pid)
+        self.interval = interval
+        self.samples = {}
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def _processes(self):
+        try:
+            return [self.root] + self.root.children(recursive=True)
+        except psutil.NoSuchProcess:
+            return []
+
+    def _run(self):
+        tracked = {}
+        while not self.stopped.wait(self.interval):
+            for proc in self._processes():
+                if proc.pid not in tracked:
+                    tracked[proc.pid] = proc
+                    proc.cpu_percent(None)  # Prime the counter
+                    continue
+                try:
+                    cpu = tracked[proc.pid].cpu_percent(None)
+                    rss = proc.memory_info().rss
+                except psutil.NoSuchProcess:
+                    continue
+                self.samples.setdefault(proc.pid, []).append((cpu, rss))
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+
+def start_service(port, server_cmd, extra_env=None):
+    """Start the analysis service and wait until /health answers"""
+    env = dict(os.environ, PORT=str(port), **(extra_env or {}))
+    cmd = server_cmd.split() if server_cmd else [sys.executable, "app.py"]
+    proc = subprocess.Popen(cmd, cwd=root_folder, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            sys.exit(f"Service exited with code {proc.returncode}")
+        try:
+            with urllib.request.urlopen(url + "/health", timeout=1):
+                return proc, url
+        except OSError:
+            time.sleep(0.25)
+    proc.terminate()
+    sys.exit("Service did not become healthy within 60 s")
+
+def percentile(values, q):
+    return float(np.percentile(values, q)) if values else float("nan")
+
+def print_report(records, elapsed, samples):
+    statuses = {}
+    for record in records:
+        statuses[record["status"]] = statuses.get(record["status"], 0) + 1
+    ok = [r for r in records if r["status"] == 200]
+
+    print(f"\nRequests: {len(records)} in {elapsed:.1f} s ({len(records) / elapsed:.2f} req/s)")
+    print(f"Successful: {len(ok)} ({len(ok) / elapsed:.2f} req/s)")
+    print("Status codes: " + ", ".join(f"{k}: {v}" for k, v in sorted(statuses.items(), key=str)))
+    print(f"Error rate: {1 - len(ok) / len(records):.1%}")
+
+    backend = [r["backend_status"] for r in ok if r["backend_status"] is not None]
+    if backend:
+        failed = sum(1 for status in backend if status != 201)
+        print(f"Backend writes: {len(backend)}, failed: {failed}")
+
+    for key, label in (("process_latency", "/process"), ("round_trip_latency", "round trip")):
+        latencies = [r[key] for r in ok]
+        print(f"{label:<11} latency p50 {percentile(latencies, 50):7.2f} s"
+              f"  p95 {percentile(latencies, 95):7.2f} s  p99 {percentile(latencies, 99):7.2f} s")
+
+    if samples:
+        print("\nWorkers:")
+        for pid, values in samples.items():
+            cpu = [v[0] for v in values]
+            rss = [v[1] / 2**20 for v in values]
+            print(f"  pid {pid}: cpu mean {np.mean(cpu):6.1f}%  max {np.max(cpu):6.1f}%"
+                  f"  rss mean {np.mean(rss):7.1f} MiB  max {np.max(rss):7.1f} MiB")
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the /process service")
+    parser.add_argument("--url", help="Target a running service instead of starting one")
+    parser.add_argument("--port", type=int, default=8101, help="Port for the locally started service")
+    parser.add_argument("--server-cmd", help="Command that starts the service (default: python app.py)")
+    parser.add_argument("--corpus", help="Directory of .wav recordings to upload")
+    parser.add_argument("--generate", type=int, default=6, help="Number of recordings to generate without --corpus")
+    parser.add_argument("--durations", default="5,20,60", help="Comma-separated durations (s) of generated recordings")
+    parser.add_argument("--requests", type=int, default=20, help="Total uploads")
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent uploads")
+    parser.add_argument("--timeout", type=float, default=600, help="Per-request timeout (s)")
+    parser.add_argument("--no-backend", action="store_true", help="Skip the stand-in /api/speechData round trip")
+    parser.add_argument("--deliver", action="store_true", help="Have the service deliver results to the stand-in directly")
+    parser.add_argument("--backend-delay", type=float, default=0.0, help="Simulated backend latency per write (s)")
+    parser.add_argument("--json", help="Also write the per-request records to this file")
+    args = parser.parse_args()
+
+    # Keep the stand-in backend's access log out of the report
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        durations = [float(d) for d in args.durations.split(",")]
+        corpus = build_corpus(args.corpus, args.generate, durations, workdir)
+        print(f"Corpus: {len(corpus)} recordings")
+
+        backend = None if args.no_backend else BackendStubServer(delay=args.backend_delay).start()
+        backend_url = backend.url if backend else None
+        deliver = args.deliver and backend is not None
+
+        service = None
+        sampler = None
+        if args.url:
+            url = args.url.rstrip("/")
+        else:
+            extra_env = {"BACKEND_URL": backend_url} if deliver else None
+            service, url = start_service(args.port, args.server_cmd, extra_env)
+            sampler = ResourceSampler(service.pid).start()
+
+        try:
+            paths = [corpus[i % len(corpus)] for i in range(args.requests)]
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+                records = list(pool.map(lambda p: run_request(url, backend_url, p, args.timeout, deliver), paths))
+            elapsed = time.perf_counter() - start
+
+            if deliver:
+                # Wait for the service's background writes to land
+                expected = sum(1 for r in records if r["status"] == 200)
+                wait_until = time.time() + 30
+                while len(backend.documents) < expected and time.time() < wait_until:
+                    time.sleep(0.1)
+                delivered_after = time.perf_counter() - start
+                print(f"Delivered {len(backend.documents)}/{expected} results directly "
+                      f"in {backend.app.config['REQUESTS']} backend requests ({delivered_after:.1f} s)")
+        finally:
+            if sampler:
+                sampler.stop()
+            if backend:
+                backend.stop()
+            if service:
+                service.terminate()
+                service.wait()
+
+    print_report(records, elapsed, sampler.samples if sampler else {})
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(records, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Accuracy and throughput report for the fast pitch engine.
+
+Compares the f0 statistics from fast_pitch against the full Praat script run
+that /process uses, and against a pitch-only Praat run.
+
+Usage:
+    python pitch_benchmark.py [audio files...] [--repeat N]
+
+Defaults to every .wav file under ./audio.
+"""
+import argparse
+import glob
+import logging
+import os
+import time
+
+import numpy as np
+from parselmouth.praat import run_file
+
+from app import calculate_praat_pitch, features, praat_script, root_folder
+from fast_pitch import analyze_pitch, pitch_features
+
+def run_praat_script(audio_path):
+    """Run the full Praat script and return its f0 statistics as floats"""
+    objects = run_file(praat_script, -20, 2, 0.3, 0, audio_path, root_folder, 80, 400, 0.01, capture_output=True)
+    values = str(objects[1]).strip().split()
+    if len(values) < len(pitch_features) + features.index("f0_mean"):
+        return None
+    result = dict(zip(features, values))
+    return {name: float(result[name]) for name in pitch_features}
+
+def time_call(func, audio_path, repeat):
+    """Return (result, best wall time in seconds) over `repeat` runs"""
+    best = np.inf
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(audio_path)
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+def report(audio_paths, repeat):
+    engines = [
+        ("praat_script", run_praat_script),
+        ("praat_pitch", calculate_praat_pitch),
+        ("fast", analyze_pitch),
+    ]
+    totals = {name: 0.0 for name, _ in engines}
+    errors = {name: [] for name in pitch_features}
+
+    for audio_path in audio_paths:
+        print(f"\n{os.path.basename(audio_path)}")
+        results = {}
+        for name, func in engines:
+            results[name], elapsed = time_call(func, audio_path, repeat)
+            totals[name] += elapsed
+            print(f"  {name:<13} {elapsed * 1000:8.1f} ms")
+
+        reference = results["praat_script"] or results["praat_pitch"]
+        print(f"  {'feature':<14}{'praat':>10}{'fast':>10}{'rel err':>10}")
+        for name in pitch_features:
+            expected = reference[name]
+            actual = results["fast"][name]
+            rel = abs(actual - expected) / expected if expected else np.nan
+            errors[name].append(rel)
+            print(f"  {name:<14}{expected:10.2f}{actual:10.2f}{rel:10.1%}")
+
+    print("\nSummary")
+    print(f"  files: {len(audio_paths)}, repeat: {repeat}")
+    for name, _ in engines:
+        print(f"  {name:<13} total {totals[name]:.3f} s")
+    if totals["fast"] > 0:
+        # praat_pitch is what /pitch runs by default, so it is the comparison that matters
+        print(f"  speedup vs praat_pitch:  {totals['praat_pitch'] / totals['fast']:.1f}x (the /pitch default)")
+        print(f"  speedup vs praat_script: {totals['praat_script'] / totals['fast']:.1f}x (full /process script, not an alternative)")
+    print(f"  {'feature':<14}{'median rel err':>16}{'max rel err':>14}")
+    for name in pitch_features:
+        print(f"  {name:<14}{np.nanmedian(errors[name]):16.1%}{np.nanmax(errors[name]):14.1%}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("audio", nargs="*", help="Audio files to analyze")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per engine; the best time is kept")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    audio_paths = args.audio or sorted(glob.glob(os.path.join(root_folder, "audio", "*.wav")))
+    report(audio_paths, args.repeat)
@@ -0,0 +1,148 @@
+import cProfile
+import io
+import os
+import pstats
+import random
+import re
+import threading
+import time
+import uuid
+
+# Profiling is opt-in: per request with the X-Profile header, or for a sampled fraction of requests
+profile_header = "X-Profile"
+profile_sample_rate = float(os.environ.get("PROFILE_SAMPLE_RATE", 0))
+profile_dir = os.environ.get("PROFILE_DIR", os.path.abspath("./profiles"))
+# Retention: the oldest profiles beyond the count, or older than the age, are deleted on save
+profile_max_count = int(os.environ.get("PROFILE_MAX_COUNT", 200))
+profile_max_age = float(os.environ.get("PROFILE_MAX_AGE_SECONDS", 7 * 24 * 3600))
+
+# cProfile can only run in one thread at a time; concurrent opt-ins run unprofiled
+_profile_lock = threading.Lock()
+_request_id_pattern = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+def new_request_id(headers):
+    """
+    Return the client's X-Request-ID if it is safe to use as a file name, otherwise a new one.
+
+    Args:
+        headers: Request headers
+
+    Returns:
+        str: Request ID
+    """
+    request_id = headers.get("X-Request-ID", "")
+    if _request_id_pattern.match(request_id):
+        return request_id
+    return uuid.uuid4().hex
+
+def should_profile(headers):
+    """
+    Decide whether to profile a request.
+
+    Args:
+        headers: Request headers
+
+    Returns:
+        bool: True if the request opted in or was sampled
+    """
+    value = headers.get(profile_header)
+    if value is not None:
+        return value.lower() in ("1", "true", "yes")
+    return profile_sample_rate > 0 and random.random() < profile_sample_rate
+
+def new_profile_id():
+    """Return a server-generated profile ID; client request IDs can repeat, so they never name profiles"""
+    return uuid.uuid4().hex
+
+def profile_call(profile_id, func, *args, **kwargs):
+    """
+    Run a function under cProfile and save the stats under the profile ID.
+
+    Args:
+        profile_id: ID the profile is stored under, from new_profile_id
+        func: Function to profile
+
+    Returns:
+        tuple: (function result, whether a profile was saved)
+    """
+    if not _profile_lock.acquire(blocking=False):
+        return func(*args, **kwargs), False
+
+    try:
+        profiler = cProfile.Profile()
+        try:
+            result = profiler.runcall(func, *args, **kwargs)
+        finally:
+            os.makedirs(profile_dir, exist_ok=True)
+            profiler.dump_stats(profile_path(profile_id))
+            prune_profiles()
+    finally:
+        _profile_lock.release()
+
+    return result, True
+
+def profile_path(profile_id):
+    """
+    Return the stats file path for a profile ID, or None if the ID is invalid.
+
+    Args:
+        profile_id: Profile ID
+
+    Returns:
+        str: Path to the .prof file
+    """
+    if not _request_id_pattern.match(profile_id):
+        return None
+    return os.path.join(profile_dir, f"{profile_id}.prof")
+
+def prune_profiles():
+    """Delete profiles beyond PROFILE_MAX_COUNT or older than PROFILE_MAX_AGE_SECONDS"""
+    cutoff = time.time() - profile_max_age
+    for index, profile in enumerate(list_profiles()):
+        if index >= profile_max_count or profile["modified"] < cutoff:
+            try:
+                os.remove(profile_path(profile["profile_id"]))
+            except OSError:
+                pass
+
+def list_profiles():
+    """
+    List saved profiles, newest first.
+
+    Returns:
+        list: Dicts with profile_id, size and modified time
+    """
+    if not os.path.isdir(profile_dir):
+        return []
+
+    profiles = []
+    for entry in os.scandir(profile_dir):
+        if entry.name.endswith(".prof"):
+            stat = entry.stat()
+            profiles.append({
+                "profile_id": entry.name[:-len(".prof")],
+                "size": stat.st_size,
+                "modified": stat.st_mtime,
+            })
+    return sorted(profiles, key=lambda p: p["modified"], reverse=True)
+
+def format_profile(profile_id, sort="cumulative", limit=40):
+    """
+    Render a saved profile as a pstats text report.
+
+    Args:
+        profile_id: Profile ID
+        sort: pstats sort key
+        limit: Number of functions to include
+
+    Returns:
+        str: Report text, or None if no profile exists for the ID
+    """
+    path = profile_path(profile_id)
+    if path is None or not os.path.exists(path):
+        return None
+
+    out = io.StringIO()
+    stats = pstats.Stats(path, stream=out)
+    stats.strip_dirs().sort_stats(sort).print_stats(limit)
+    return out.getvalue()
@@ -0,0 +1,129 @@
+import os
+import threading
+import time
+
+import soundfile as sf
+
+from scheduler import affordable_duration
+
+# Progressive /process: a quick estimate from the start of the recording within
+# the latency budget, refined to the full-precision result in the background
+progressive_budget = float(os.environ.get("PROGRESSIVE_BUDGET_SECONDS", 3.0))
+min_preview_seconds = float(os.environ.get("PROGRESSIVE_MIN_SECONDS", 5.0))
+# Estimates run on their own slots so they never queue behind full analyses
+preview_workers = int(os.environ.get("PROGRESSIVE_WORKERS", 1))
+# Share of the budget the excerpt is sized for; the rest absorbs cost model error
+budget_headroom = 0.8
+# How long finished results stay available at /results/<id>
+result_ttl = float(os.environ.get("RESULT_TTL_SECONDS", 600))
+# Longest wait a client can ask GET /results/<id> to block for the final result
+max_result_wait = 60.0
+# Totals that only describe the excerpt; rates and ratios carry over to the whole recording
+excerpt_totals = ("original_duration", "number_of_syllables", "number_of_pauses", "speaking_duration")
+
+def preview_seconds(budget, duration):
+    """
+    Length of the leading excerpt to analyze for the quick estimate.
+
+    Args:
+        budget: Latency budget in seconds
+        duration: Recording duration in seconds
+
+    Returns:
+        float: Excerpt length, at least min_preview_seconds and at most duration
+    """
+    return min(duration, max(min_preview_seconds, affordable_duration(budget * budget_headroom)))
+
+def write_preview(audio_path, seconds, preview_path):
+    """
+    Write the first seconds of a recording to a new file.
+
+    Args:
+        audio_path: Path to the audio file
+        seconds: Excerpt length in seconds
+        preview_path: Output path
+
+    Returns:
+        float: Length of the written excerpt in seconds
+    """
+    info = sf.info(audio_path)
+    # float64 round-trips every PCM subtype exactly, so the excerpt matches the original samples
+    y, sr = sf.read(audio_path, frames=int(seconds * info.samplerate), dtype="float64")
+    subtype = info.subtype if sf.check_format("WAV", info.subtype) else None
+    sf.write(preview_path, y, sr, subtype=subtype)
+    return len(y) / sr
+
+def approximate_result(result, analyzed):
+    """
+    Turn an excerpt's analysis into the quick estimate for the whole recording.
+
+    Args:
+        result: Analysis result of the excerpt
+        analyzed: Length of the excerpt in seconds
+
+    Returns:
+        dict: The result without excerpt_totals, with analyzed_seconds added
+    """
+    estimate = {key: value for key, value in result.items() if key not in excerpt_totals}
+    estimate["analyzed_seconds"] = analyzed
+    return estimate
+
+class ResultStore:
+    """
+    In-memory results of progressive requests, keyed by result ID.
+
+    Each entry moves from "pending" to "approximate" to "final" (or "failed").
+    Readers can block until an entry is final. Entries expire result_ttl
+    seconds after their last update. The store is per process, so with several
+    server processes the follow-up fetch must reach the same one.
+    """
+
+    finished = ("final", "failed")
+
+    def __init__(self, ttl=result_ttl):
+        self.ttl = ttl
+        self.entries = {}
+        self.condition = threading.Condition()
+
+    def _expire(self, now):
+        expired = [key for key, entry in self.entries.items() if now - entry["updated"] > self.ttl]
+        for key in expired:
+            del self.entries[key]
+
+    def put(self, result_id, status, result=None):
+        """
+        Set the status and result of an entry.
+
+        Args:
+            result_id: Result ID
+            status: "pending", "approximate", "final" or "failed"
+            result: Analysis result, or an error dict for "failed"
+        """
+        with self.condition:
+            now = time.monotonic()
+            self._expire(now)
+            self.entries[result_id] = {"status": status, "result": result, "updated": now}
+            self.condition.notify_all()
+
+    def get(self, result_id, wait=0.0):
+        """
+        Return an entry, waiting up to `wait` seconds for it to become final.
+
+        Args:
+            result_id: Result ID
+            wait: Seconds to block while the entry is not final
+
+        Returns:
+            tuple: (status, result), or None if the ID is unknown or expired
+        """
+        deadline = time.monotonic() + wait
+        with self.condition:
+            while True:
+                self._expire(time.monotonic())
+                entry = self.entries.get(result_id)
+                if entry is None:
+                    return None
+                remaining = deadline - time.monotonic()
+                if entry["status"] in self.finished or remaining <= 0:
+                    return entry["status"], entry["result"]
+                self.condition.wait(remaining)
@@ -0,0 +1,149 @@
+"""
+Recompute aggregate metrics from stored frame-level tracks.
+
+Reads the contour store (CONTOUR_DIR, filled by /process requests that pass a
+recording_id) through memory maps and evaluates metrics without decoding audio
+or running Praat, so new or changed metric definitions can be applied across
+the whole archive.
+
+Usage:
+    python recompute_metrics.py [recording ids...] [--dir DIR] [--metrics a,b] [--json]
+
+Defaults to every stored recording and every metric below.
+"""
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+
+import contour_store
+from contour_store import list_recordings, load_contours, track_times
+
+def voiced_pitch(tracks, meta):
+    f0 = np.asarray(tracks["pitch"], dtype=np.float64)
+    return f0[np.isfinite(f0)]
+
+def pitch_statistic(func):
+    def metric(tracks, meta):
+        f0 = voiced_pitch(tracks, meta)
+        return round(float(func(f0)), 2) if len(f0) else 0.0
+    return metric
+
+def pitch_fluctuation(tracks, meta):
+    f0 = voiced_pitch(tracks, meta)
+    return float(f0.max() - f0.min()) if len(f0) else 0.0
+
+def speaking_duration(tracks, meta):
+    sounding = np.asarray(tracks["sounding"], dtype=np.float64)
+    return float((sounding[:, 1] - sounding[:, 0]).sum())
+
+def rate_of_speech(tracks, meta):
+    return len(tracks["syllable_nuclei"]) / meta["duration"]
+
+def articulation_rate(tracks, meta):
+    speaking = speaking_duration(tracks, meta)
+    return len(tracks["syllable_nuclei"]) / speaking if speaking > 0 else 0.0
+
+def chunk_speech_rates(tracks, meta, chunk_duration=5.0):
+    """Syllables per second in each chunk, skipping a last chunk shorter than 1 second"""
+    duration = meta["duration"]
+    starts = np.arange(0.0, duration, chunk_duration)
+    lengths = np.minimum(chunk_duration, duration - starts)
+    counts = np.histogram(tracks["syllable_nuclei"], bins=np.append(starts, duration))[0]
+    keep = lengths >= 1.0
+    return counts[keep] / lengths[keep]
+
+def speech_rate_fluctuation(tracks, meta):
+    # Counted from the whole-file nuclei, where /process re-runs Praat per chunk
+    rates = chunk_speech_rates(tracks, meta)
+    return float(rates.max() - rates.min()) if len(rates) else 0.0
+
+def sounding_intensity_std(tracks, meta):
+    intensity = tracks["intensity"]
+    times = track_times(meta, "intensity", len(intensity))
+    inside = np.zeros(len(times), dtype=bool)
+    for start, end in tracks["sounding"]:
+        inside |= (times >= start) & (times < end)
+    return float(np.std(intensity[inside])) if inside.any() else 0.0
+
+def mean_of(name):
+    def metric(tracks, meta):
+        return float(np.mean(tracks[name]))
+    return metric
+
+# Metric name to func(tracks, meta); tracks are read-only memory maps.
+# f0_min and f0_max are frame values, where Praat interpolates between frames.
+metrics = {
+    "f0_mean": pitch_statistic(np.mean),
+    "f0_std": pitch_statistic(lambda f0: np.std(f0, ddof=1)),
+    "f0_median": pitch_statistic(np.median),
+    "f0_min": pitch_statistic(np.min),
+    "f0_max": pitch_statistic(np.max),
+    "pitch_fluctuation": pitch_fluctuation,
+    "number_of_syllables": lambda tracks, meta: len(tracks["syllable_nuclei"]),
+    "rate_of_speech": rate_of_speech,
+    "articulation_rate": articulation_rate,
+    "speaking_duration": speaking_duration,
+    "speech_rate_fluctuation": speech_rate_fluctuation,
+    "sounding_intensity_std": sounding_intensity_std,
+    "mean_rms": mean_of("rms"),
+    "mean_spectral_centroid": mean_of("spectral_centroid"),
+    "mean_zero_crossing_rate": mean_of("zero_crossing_rate"),
+}
+
+def recompute(recording_ids, names, root=None):
+    """
+    Evaluate metrics over stored recordings.
+
+    Args:
+        recording_ids: Recordings to evaluate
+        names: Metric names
+        root: Store directory, defaults to CONTOUR_DIR
+
+    Returns:
+        dict: Recording ID to metric values (None for recordings not in the store)
+    """
+    results = {}
+    for recording_id in recording_ids:
+        loaded = load_contours(recording_id, root=root)
+        if loaded is None:
+            results[recording_id] = None
+            continue
+        tracks, meta = loaded
+        results[recording_id] = {name: metrics[name](tracks, meta) for name in names}
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("recordings", nargs="*", help="Recording IDs")
+    parser.add_argument("--dir", default=contour_store.contour_dir, help="Contour store directory (default: CONTOUR_DIR)")
+    parser.add_argument("--metrics", default=",".join(metrics), help="Comma-separated metric names")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    if not args.dir:
+        parser.error("no store directory: set CONTOUR_DIR or pass --dir")
+    names = [name.strip() for name in args.metrics.split(",") if name.strip()]
+    unknown = [name for name in names if name not in metrics]
+    if unknown:
+        parser.error(f"unknown metrics: {', '.join(unknown)}")
+
+    start = time.perf_counter()
+    results = recompute(args.recordings or list_recordings(args.dir), names, args.dir)
+    elapsed = time.perf_counter() - start
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for recording_id, values in results.items():
+            print(recording_id)
+            if values is None:
+                print("  not in the store")
+                continue
+            for name, value in values.items():
+                print(f"  {name:<24} {value:.4f}")
+    print(f"{len(results)} recordings, {len(names)} metrics in {elapsed:.3f} s", file=sys.stderr)
+    if any(values is None for values in results.values()):
+        sys.exit(1)
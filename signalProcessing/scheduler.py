@@ -0,0 +1,203 @@
+import heapq
+import itertools
+import os
+import socket
+import threading
+import time
+
+# Admission and scheduling settings
+analysis_workers = int(os.environ.get("ANALYSIS_WORKERS", 1))          # Concurrent analyses per process
+max_queue_length = int(os.environ.get("MAX_QUEUE_LENGTH", 32))         # Waiting requests before rejecting
+default_deadline = float(os.environ.get("REQUEST_DEADLINE_SECONDS", 300))
+max_deadline = float(os.environ.get("MAX_REQUEST_DEADLINE_SECONDS", 1800))
+# Seconds of priority a waiting request gains per second waited, so long uploads are not starved
+aging_rate = float(os.environ.get("SCHEDULER_AGING", 0.1))
+
+# Initial cost model: analysis seconds = overhead + rate * audio seconds, refined from completed jobs
+cost_overhead = 0.5
+cost_per_audio_second = 0.3
+cost_smoothing = 0.2
+
+class AnalysisCancelled(Exception):
+    """Raised inside an analysis when its deadline passes or the client disconnects"""
+
+class AdmissionRejected(Exception):
+    """
+    Raised when a request cannot be queued or cannot finish before its deadline.
+
+    retry_after is None when the deadline is shorter than the job itself, so
+    retrying with the same deadline can never succeed.
+    """
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class CancelToken:
+    """
+    Carries a request's deadline and client connection into the analysis.
+
+    Long-running stages call check() between units of work (Praat runs, chunks)
+    so abandoned requests stop at the next boundary.
+    """
+
+    def __init__(self, deadline_seconds, client_socket=None):
+        self.deadline = time.monotonic() + deadline_seconds
+        self.client_socket = client_socket
+        self.reason = None
+
+    def remaining(self):
+        return self.deadline - time.monotonic()
+
+    def client_disconnected(self):
+        """Peek at the client socket; an orderly EOF means the client went away"""
+        if self.client_socket is None:
+            return False
+        try:
+            return self.client_socket.recv(1, socket.MSG_PEEK | socket.MSG_DONTWAIT) == b""
+        except (BlockingIOError, InterruptedError):
+            return False
+        except OSError:
+            return True
+
+    def cancelled(self):
+        if self.reason is None:
+            if self.remaining() <= 0:
+                self.reason = "deadline exceeded"
+            elif self.client_disconnected():
+                self.reason = "client disconnected"
+        return self.reason is not None
+
+    def check(self):
+        if self.cancelled():
+            raise AnalysisCancelled(self.reason)
+
+def estimate_cost(duration):
+    """
+    Estimate the analysis time of a recording.
+
+    Args:
+        duration: Audio duration in seconds
+
+    Returns:
+        float: Estimated analysis time in seconds
+    """
+    return cost_overhead + cost_per_audio_second * duration
+
+def affordable_duration(seconds):
+    """
+    Longest recording the cost model expects to analyze within a time budget.
+
+    Args:
+        seconds: Time budget in seconds
+
+    Returns:
+        float: Audio duration in seconds, 0 if the budget is below the fixed overhead
+    """
+    return max(0.0, (seconds - cost_overhead) / cost_per_audio_second)
+
+def record_cost(duration, elapsed):
+    """Refine the cost model with the measured time of a completed analysis"""
+    global cost_per_audio_second
+    if duration > 0 and elapsed > cost_overhead:
+        observed = (elapsed - cost_overhead) / duration
+        cost_per_audio_second += cost_smoothing * (observed - cost_per_audio_second)
+
+class Scheduler:
+    """
+    Shortest-job-first scheduler with aging over a fixed number of analysis slots.
+
+    Request threads block in run() until their job reaches the front of the
+    queue and a slot is free. The queue is ordered by estimated cost plus
+    aging_rate times arrival time, which is equivalent to letting every waiting
+    job's priority improve at the same rate while it waits.
+    """
+
+    def __init__(self, workers=analysis_workers, max_queue=max_queue_length, aging=aging_rate):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.aging = aging
+        self.condition = threading.Condition()
+        self.queue = []
+        self.running = {}
+        self.counter = itertools.count()
+
+    def estimated_wait(self, cost, now):
+        """Estimated queueing delay for a new job, from the work that would run before it"""
+        key = cost + self.aging * now
+        ahead = sum(entry[3] for entry in self.queue if entry[2] and entry[0] <= key)
+        in_flight = sum(max(0.0, end - now) for end in self.running.values())
+        return (ahead + in_flight) / self.workers
+
+    def _admit(self, duration, token):
+        cost = estimate_cost(duration)
+        now = time.monotonic()
+
+        if sum(1 for entry in self.queue if entry[2]) >= self.max_queue:
+            raise AdmissionRejected("Server busy, too many queued requests", retry_after=int(self.estimated_wait(0, now)) + 1)
+
+        if cost > token.remaining():
+            raise AdmissionRejected(f"Estimated analysis time of {cost:.0f} s exceeds the request deadline")
+
+        wait = self.estimated_wait(cost, now)
+        if wait + cost > token.remaining():
+            raise AdmissionRejected(
+                f"Estimated completion in {wait + cost:.0f} s exceeds the request deadline",
+                retry_after=int(wait) + 1,
+            )
+
+        entry = [cost + self.aging * now, next(self.counter), True, cost]
+        heapq.heappush(self.queue, entry)
+        return entry
+
+    def _leave_queue(self, entry):
+        # Lazy removal: mark the entry and drop it when it reaches the top
+        entry[2] = False
+        while self.queue and not self.queue[0][2]:
+            heapq.heappop(self.queue)
+        self.condition.notify_all()
+
+    def run(self, duration, token, func, *args, learn_cost=True, **kwargs):
+        """
+        Queue a job and run it once scheduled.
+
+        Args:
+            duration: Audio duration in seconds, used to estimate the job's cost
+            token: CancelToken for the request
+            func: Analysis function, run on the calling thread
+            learn_cost: Whether the job's time refines the cost model; only
+                full, unprofiled analyses are representative. Jobs that raise
+                or return an {"error": ...} result never do.
+
+        Returns:
+            Result of func
+        """
+        with self.condition:
+            entry = self._admit(duration, token)
+            try:
+                while not (len(self.running) < self.workers and self.queue[0] is entry):
+                    token.check()
+                    self.condition.wait(timeout=0.25)
+            except AnalysisCancelled:
+                self._leave_queue(entry)
+                raise
+            heapq.heappop(self.queue)
+            ticket = entry[1]
+            self.running[ticket] = time.monotonic() + entry[3]
+            self.condition.notify_all()
+
+        start = time.monotonic()
+        completed = False
+        try:
+            result = func(*args, **kwargs)
+            completed = not (isinstance(result, dict) and "error" in result)
+            return result
+        finally:
+            elapsed = time.monotonic() - start
+            with self.condition:
+                del self.running[ticket]
+                if learn_cost and completed:
+                    record_cost(duration, elapsed)
+                while self.queue and not self.queue[0][2]:
+                    heapq.heappop(self.queue)
+                self.condition.notify_all()
@@ -0,0 +1,185 @@
+"""
+Delivery tests against the stand-in backend.
+
+Usage:
+    python -m pytest test_delivery.py
+"""
+import json
+import time
+import unittest
+
+from backend_stub import BackendStubServer
+from delivery import ResultDelivery, to_speech_data, valid_object_id
+from load_test import default_thresholds, load_test_user_id
+
+result = {
+    "relative_volume": 12.5, "f0_mean": "120.4", "rate_of_speech": "3",
+    "volume_fluctuation": 2.1, "f0_std": "20.2", "speech_rate_fluctuation": 1.2,
+    "ambient_noise": "quiet",
+}
+
+def document(user_id=load_test_user_id):
+    return to_speech_data(result, user_id, default_thresholds)
+
+class DeliveryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.stub = BackendStubServer().start()
+
+    def tearDown(self):
+        self.stub.stop()
+
+    def delivery(self, **kwargs):
+        # No backoff to speak of, one worker so batching is deterministic
+        options = dict(backoff=0.01, workers=1, max_retries=3)
+        options.update(kwargs)
+        delivery = ResultDelivery(self.stub.url, **options)
+        self.addCleanup(delivery.pool.close)
+        return delivery
+
+    def test_delivers_single_document(self):
+        delivery = self.delivery()
+        sent = document()
+        delivery.submit(sent)
+        delivery.flush()
+
+        self.assertEqual(delivery.stats()["delivered"], 1)
+        self.assertEqual(len(self.stub.documents), 1)
+        self.assertEqual(self.stub.documents[0]["metrics"], sent["metrics"])
+
+    def test_retries_server_errors_with_backoff(self):
+        self.stub.fail_next(503, 502)
+        delivery = self.delivery()
+        delivery.submit(document())
+        delivery.flush()
+
+        stats = delivery.stats()
+        self.assertEqual((stats["delivered"], stats["failed"], stats["retries"]), (1, 0, 2))
+        self.assertEqual(len(self.stub.documents), 1)
+
+    def test_gives_up_after_max_retries(self):
+        self.stub.fail_next(500, 500, 500)
+        delivery = self.delivery(max_retries=2)
+        delivery.submit(document())
+        delivery.flush()
+
+        stats = delivery.stats()
+        self.assertEqual((stats["delivered"], stats["failed"], stats["retries"]), (0, 1, 2))
+        self.assertEqual(self.stub.documents, [])
+
+    def test_does_not_retry_client_errors(self):
+        self.stub.fail_next(400)
+        delivery = self.delivery()
+        delivery.submit(document())
+        delivery.flush()
+
+        stats = delivery.stats()
+        self.assertEqual((stats["delivered"], stats["failed"], stats["retries"]), (0, 1, 0))
+
+    def test_batches_queued_documents(self):
+        delivery = self.delivery(batch_window=0.5)
+        for _ in range(5):
+            delivery.submit(document())
+        delivery.flush()
+
+        stats = delivery.stats()
+        self.assertEqual((stats["delivered"], stats["batches"]), (5, 1))
+        self.assertEqual(self.stub.app.config["REQUESTS"], 1)
+        self.assertEqual(len(self.stub.documents), 5)
+
+    def test_rejected_batch_is_resent_individually(self):
+        self.stub.fail_next(400)
+        delivery = self.delivery(batch_window=0.5)
+        for _ in range(5):
+            delivery.submit(document())
+        delivery.flush()
+
+        stats = delivery.stats()
+        self.assertEqual((stats["delivered"], stats["failed"], stats["split_batches"]), (5, 0, 1))
+        self.assertEqual(len(self.stub.documents), 5)
+
+    def test_invalid_document_only_drops_itself(self):
+        delivery = self.delivery(batch_window=0.5)
+        for index in range(5):
+            delivery.submit(document("load-test" if index == 2 else load_test_user_id))
+        delivery.flush()
+
+        stats = delivery.stats()
+        self.assertEqual((stats["delivered"], stats["failed"]), (4, 1))
+        self.assertEqual(len(self.stub.documents), 4)
+
+    def test_failing_batch_is_not_split(self):
+        # Splitting during an outage would multiply the requests to the backend
+        self.stub.fail_next(500, 500)
+        delivery = self.delivery(batch_window=0.5, max_retries=1)
+        for _ in range(3):
+            delivery.submit(document())
+        delivery.flush()
+
+        stats = delivery.stats()
+        self.assertEqual((stats["delivered"], stats["failed"], stats["split_batches"]), (0, 3, 0))
+        self.assertEqual(self.stub.app.config["REQUESTS"], 2)
+
+    def test_full_queue_drops_new_documents(self):
+        self.stub.stall_next(1.0)
+        delivery = self.delivery(max_pending=2)
+        self.assertTrue(delivery.submit(document()))
+        # Wait until the worker is busy with the first document
+        time.sleep(0.3)
+        accepted = [delivery.submit(document()) for _ in range(3)]
+        delivery.flush()
+
+        stats = delivery.stats()
+        self.assertEqual(accepted, [True, True, False])
+        self.assertEqual((stats["delivered"], stats["dropped"]), (3, 1))
+        self.assertEqual(len(self.stub.documents), 3)
+
+    def test_retry_after_timeout_is_stored_once(self):
+        # The first write is stored but its response arrives after the client timed out
+        self.stub.stall_next(1.0)
+        delivery = self.delivery(timeout=0.3)
+        delivery.submit(document())
+        delivery.flush()
+
+        stats = delivery.stats()
+        self.assertEqual((stats["delivered"], stats["failed"]), (1, 0))
+        self.assertGreaterEqual(stats["retries"], 1)
+        self.assertEqual(len(self.stub.documents), 1)
+
+class SpeechDataTest(unittest.TestCase):
+
+    def test_object_id_validation(self):
+        self.assertTrue(valid_object_id("65f1c0ffee0123456789abcd"))
+        self.assertFalse(valid_object_id("load-test"))
+        self.assertFalse(valid_object_id("65f1c0ffee0123456789abc"))
+        self.assertFalse(valid_object_id(None))
+
+    def test_documents_have_distinct_delivery_ids(self):
+        first, second = document(), document()
+        self.assertNotEqual(first["delivery_id"], second["delivery_id"])
+        json.dumps(first)
+
+    def test_queue_delivery_rejects_bad_user_id(self):
+        import app
+
+        class Recorder:
+            submitted = []
+            def submit(self, document):
+                self.submitted.append(document)
+                return True
+
+        recorder = Recorder()
+        original, app.result_delivery = app.result_delivery, recorder
+        self.addCleanup(setattr, app, "result_delivery", original)
+        form = {"thresholds": json.dumps(default_thresholds)}
+
+        status = app.queue_delivery(result, dict(form, user_id="load-test"))
+        self.assertEqual(status["status"], "rejected")
+        self.assertEqual(recorder.submitted, [])
+
+        status = app.queue_delivery(result, dict(form, user_id=load_test_user_id))
+        self.assertEqual(status["status"], "queued")
+        self.assertEqual(len(recorder.submitted), 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,38 @@
+"""
+float32 vs float64 drift tests for the signal pipeline.
+
+Usage:
+    python -m pytest test_dtype.py
+"""
+import logging
+import os
+import tempfile
+import unittest
+
+from dtype_benchmark import MAX_DRIFT_DB, drift, generate_stereo
+from load_test import generate_recording
+
+class DtypeDriftTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        logging.disable(logging.INFO)
+        cls.workdir = tempfile.TemporaryDirectory()
+        cls.mono = os.path.join(cls.workdir.name, "generated_mono.wav")
+        cls.stereo = os.path.join(cls.workdir.name, "generated_stereo.wav")
+        generate_recording(cls.mono, 30)
+        generate_stereo(cls.mono, cls.stereo)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.workdir.cleanup()
+        logging.disable(logging.NOTSET)
+
+    def test_mono_drift_is_bounded(self):
+        self.assertLessEqual(drift(self.mono), MAX_DRIFT_DB)
+
+    def test_stereo_drift_is_bounded(self):
+        self.assertLessEqual(drift(self.stereo), MAX_DRIFT_DB)
+
+if __name__ == "__main__":
+    unittest.main()